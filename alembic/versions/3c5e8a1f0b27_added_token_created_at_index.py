@@ -0,0 +1,34 @@
+"""Replaced Token unique constraint with ix_token_token, added Token created_at index
+
+Revision ID: 3c5e8a1f0b27
+Revises: f9e96a712e7d
+Create Date: 2026-10-15 10:12:41.208317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e8a1f0b27'
+down_revision: Union[str, None] = 'f9e96a712e7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY нельзя выполнять внутри транзакции миграции
+    with op.get_context().autocommit_block():
+        op.execute('CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_token_token ON "Token" (token)')
+        # Токен ищется только по ix_token_token, created_at нужен для очистки просроченных токенов
+        op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_token_created_at ON "Token" (created_at)')
+    # Уникальность токена обеспечивается индексом ix_token_token
+    op.execute('ALTER TABLE "Token" DROP CONSTRAINT IF EXISTS "Token_token_key"')
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE "Token" ADD CONSTRAINT "Token_token_key" UNIQUE (token)')
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_token_created_at')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_token_token')
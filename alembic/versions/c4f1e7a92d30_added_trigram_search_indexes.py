@@ -0,0 +1,41 @@
+"""Added pg_trgm GIN indexes for search fields
+
+Revision ID: c4f1e7a92d30
+Revises: 3c5e8a1f0b27
+Create Date: 2026-10-15 12:24:08.913472
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1e7a92d30'
+down_revision: Union[str, None] = '3c5e8a1f0b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (индекс, таблица, столбец) полей контекстного поиска (search_fields view-классов)
+TRGM_INDEXES: tuple[tuple[str, str, str], ...] = (
+    ("ix_user_username_trgm", "User", "username"),
+    ("ix_advertisement_title_trgm", "Advertisement", "title"),
+    ("ix_advertisement_description_trgm", "Advertisement", "description"),
+)
+
+
+def upgrade() -> None:
+    # Условия поиска ILIKE '%...%' не используют B-tree индексы, в отличие от триграммных
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for index, table, column in TRGM_INDEXES:
+            op.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} '
+                f'ON "{table}" USING gin ({column} gin_trgm_ops)'
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index, _, _ in TRGM_INDEXES:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {index}')
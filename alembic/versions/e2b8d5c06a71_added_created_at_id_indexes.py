@@ -0,0 +1,37 @@
+"""Added (created_at, id) ordering indexes
+
+Revision ID: e2b8d5c06a71
+Revises: c4f1e7a92d30
+Create Date: 2026-10-15 13:05:46.281930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8d5c06a71'
+down_revision: Union[str, None] = 'c4f1e7a92d30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (индекс, таблица, столбцы) упорядочивания по дате, дополненного по id
+ORDERING_INDEXES: tuple[tuple[str, str, str], ...] = (
+    ("ix_user_registered_at_id", "User", "registered_at, id"),
+    ("ix_advertisement_created_at_id", "Advertisement", "created_at, id"),
+)
+
+
+def upgrade() -> None:
+    # Страница, упорядоченная по дате, читается по индексу без сортировки всей таблицы,
+    # в том числе при выводе по курсору WHERE (created_at, id) > (...)
+    with op.get_context().autocommit_block():
+        for index, table, columns in ORDERING_INDEXES:
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} ON "{table}" ({columns})')
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index, _, _ in ORDERING_INDEXES:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {index}')
@@ -22,13 +22,46 @@ branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
 
+# Количество ролей, вставляемых за одну группу запросов
+BATCH_SIZE = 20
+
+# Значения по умолчанию полей Right, не указанные в схеме прав
+RIGHT_DEFAULTS = {
+    column.key: column.default.arg
+    for column in Right.__table__.columns
+    if column.default is not None
+}
+
+
+async def insert_roles(session: AsyncSession, roles: list[dict]):
+    role_ids = await session.scalars(
+        sa.insert(Role).returning(Role.id, sort_by_parameter_order=True),
+        [{"name": role["name"]} for role in roles],
+    )
+    role_rights = [
+        (role_id, RIGHT_DEFAULTS | right)
+        for role_id, role in zip(role_ids.all(), roles)
+        for right in role["rights"]
+    ]
+    right_ids = await session.scalars(
+        sa.insert(Right).returning(Right.id, sort_by_parameter_order=True),
+        [right for _, right in role_rights],
+    )
+    await session.execute(
+        sa.insert(roles_rights),
+        [
+            {"role_id": role_id, "right_id": right_id}
+            for (role_id, _), right_id in zip(role_rights, right_ids.all())
+        ],
+    )
+
+
 async def insert_data(async_conn: AsyncConnection):
     session = AsyncSession(bind=async_conn)
     try:
-        for role in cgf.ROLE_RIGHTS_SCHEMA:
-            role_obj = Role(name=role["name"])
-            role_obj.rights.extend([Right(**right) for right in role["rights"]])
-            session.add(role_obj)
+        roles = cgf.ROLE_RIGHTS_SCHEMA
+        for start in range(0, len(roles), BATCH_SIZE):
+            await insert_roles(session, roles[start : start + BATCH_SIZE])
         await session.commit()
     finally:
         await session.close()
@@ -1,7 +1,8 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from server.lifespan import lifespan
-from server.views import adv_router, auth_router, usr_router
+from server.views import adv_router, auth_router, health_router, usr_router
 
 
 def get_app() -> FastAPI:
@@ -13,10 +14,12 @@ def get_app() -> FastAPI:
         description="API service of advertisements for sale/purchase",
         version="1.0",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
     app.include_router(usr_router)
     app.include_router(adv_router)
     app.include_router(auth_router)
+    app.include_router(health_router)
     return app
 
 
@@ -1,28 +1,242 @@
+import asyncio
+import hmac
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from functools import partial
+from math import ceil
+from typing import Mapping
+
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import LRUCache
 from fastapi import HTTPException
 
-from server.models import ORM_MODEL, Right, Role, User
+from server.config import (
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
+    ARGON2_TIME_COST,
+    HASH_POOL_SIZE,
+    VERIFY_BATCH_SIZE,
+    VERIFY_CACHE_SIZE,
+)
+from server.models import ORM_MODEL, Right, User
+
+# Пул процессов для хеширования паролей: хеширование нагружает CPU на сотни миллисекунд,
+# поэтому вычисления выносятся из цикла событий, чтобы не блокировать остальные запросы
+_HASH_POOL_WORKERS: int = HASH_POOL_SIZE or os.cpu_count() or 1
+_HASH_POOL = ProcessPoolExecutor(
+    max_workers=_HASH_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+)
+
+_PASSWORD_HASHER = PasswordHasher(
+    time_cost=ARGON2_TIME_COST, memory_cost=ARGON2_MEMORY_COST, parallelism=ARGON2_PARALLELISM
+)
+# Очередь проверки паролей и обрабатывающая ее фоновая задача (см. check_password)
+_verify_queue: asyncio.Queue | None = None
+_verify_worker: asyncio.Task | None = None
+
+# Префиксы хешей bcrypt, сохраненных до перехода на Argon2id
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+# Успешные проверки паролей: HMAC от пары (хеш, пароль) на ключе процесса.
+# Исходный пароль в кеше не хранится, смена пароля меняет хеш и, следовательно, ключ кеша
+_VERIFY_KEY: bytes = os.urandom(32)
+_verified: LRUCache[bytes, bool] = LRUCache(maxsize=VERIFY_CACHE_SIZE)
+
+# Значение отсутствующего в объекте прав поля (см. check_permissions)
+_MISSING = object()
+
+
+def _hashpw(password: str) -> str:
+    """Функция хеширования пароля (Argon2id), выполняемая в пуле процессов
+
+    :param str password: оригинальный пароль
+    :return str: хешированный пароль
+    """
+    return _PASSWORD_HASHER.hash(password)
+
+
+def _checkpw(password: str, hashed_password: str) -> bool:
+    """Функция сравнения паролей, выполняемая в пуле процессов
+
+    Алгоритм определяется по префиксу хеша: поддерживаются Argon2id и bcrypt.
+
+    :param str password: оригинальный пароль
+    :param str hashed_password: хешированный пароль
+    :return bool: True - если пароли совпадают, иначе False
+    """
+    if hashed_password.startswith(_BCRYPT_PREFIXES):
+        return bcrypt.checkpw(password.encode(), hashed_password.encode())
+    try:
+        return _PASSWORD_HASHER.verify(hashed_password, password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Функция проверки необходимости перехеширования пароля
 
+    :param str hashed_password: хешированный пароль
+    :return bool: True - если хеш получен bcrypt или с устаревшими параметрами Argon2id
+    """
+    if hashed_password.startswith(_BCRYPT_PREFIXES):
+        return True
+    return _PASSWORD_HASHER.check_needs_rehash(hashed_password)
 
-def hash_password(data: dict[str, str]) -> dict[str, str]:
+
+async def hash_password(data: dict[str, str]) -> dict[str, str]:
     """Функция хеширования пароля
 
     :param dict[str, str] data: словарь с оригинальным паролем под ключом 'password'
     :return dict[str, str]: словарь с хешированным паролем под ключом 'password'
     """
-    hashed_password: bytes = bcrypt.hashpw(data["password"].encode(), bcrypt.gensalt())
-    data["password"] = hashed_password.decode()
+    loop = asyncio.get_running_loop()
+    data["password"] = await loop.run_in_executor(_HASH_POOL, _hashpw, data["password"])
     return data
 
 
-def check_password(password: str, hashed_password: str) -> bool:
+def _verify_batch(items: list[tuple[str, str]]) -> list[bool | Exception]:
+    """Функция сравнения группы паролей, выполняемая в пуле процессов
+
+    Ошибка проверки одной пары (например, поврежденный хеш bcrypt) возвращается
+    как ее результат и не затрагивает остальные пары группы.
+
+    :param list[tuple[str, str]] items: пары (оригинальный пароль, хешированный пароль)
+    :return list[bool | Exception]: результаты сравнения или ошибки в порядке следования пар
+    """
+    results: list[bool | Exception] = []
+    for password, hashed_password in items:
+        try:
+            results.append(_checkpw(password, hashed_password))
+        except Exception as exc:
+            results.append(exc)
+    return results
+
+
+def _resolve_batch(futures: list[asyncio.Future], batch_future: asyncio.Future):
+    """Функция передачи результатов проверки группы паролей ожидающим запросам
+
+    :param list[asyncio.Future] futures: объекты ожидания запросов группы
+    :param asyncio.Future batch_future: объект ожидания проверки группы в пуле процессов
+    """
+    if batch_future.cancelled():
+        for future in futures:
+            future.cancel()
+        return
+    exception: BaseException | None = batch_future.exception()
+    for index, future in enumerate(futures):
+        if future.done():
+            continue
+        if exception is not None:
+            # группа не выполнена целиком (например, аварийное завершение процесса пула)
+            future.set_exception(exception)
+            continue
+        result: bool | Exception = batch_future.result()[index]
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+
+async def _run_verify_worker(queue: asyncio.Queue):
+    """Фоновая задача, распределяющая ожидающие проверки паролей по процессам пула
+
+    Из очереди забираются все ожидающие запросы (не более VERIFY_BATCH_SIZE на процесс пула)
+    и делятся на группы по числу процессов: одновременные проверки выполняются параллельно,
+    а не последовательно в одном процессе. Результат группы не ожидается, поэтому
+    следующие запросы распределяются, пока выполняются предыдущие.
+
+    :param asyncio.Queue queue: очередь запросов проверки паролей
+    """
+    loop = asyncio.get_running_loop()
+    max_pending: int = VERIFY_BATCH_SIZE * _HASH_POOL_WORKERS
+    while True:
+        pending: list[tuple[str, str, asyncio.Future]] = [await queue.get()]
+        while len(pending) < max_pending and not queue.empty():
+            pending.append(queue.get_nowait())
+        size: int = ceil(len(pending) / _HASH_POOL_WORKERS)
+        for start in range(0, len(pending), size):
+            end: int = start + size
+            batch: list[tuple[str, str, asyncio.Future]] = pending[start:end]
+            items: list[tuple[str, str]] = [(password, hashed) for password, hashed, _ in batch]
+            batch_future: asyncio.Future = loop.run_in_executor(_HASH_POOL, _verify_batch, items)
+            batch_future.add_done_callback(partial(_resolve_batch, [item[2] for item in batch]))
+
+
+def _get_verify_queue() -> asyncio.Queue:
+    """Функция получения очереди проверки паролей
+
+    Фоновая задача запускается при первом обращении в текущем цикле событий.
+
+    :return asyncio.Queue: очередь запросов проверки паролей
+    """
+    global _verify_queue, _verify_worker
+    loop = asyncio.get_running_loop()
+    if _verify_worker is None or _verify_worker.done() or _verify_worker.get_loop() is not loop:
+        _verify_queue = asyncio.Queue()
+        _verify_worker = loop.create_task(_run_verify_worker(_verify_queue))
+    return _verify_queue
+
+
+async def check_password(password: str, hashed_password: str) -> bool:
     """Функция сравнения оригинальным и хешированного пароля
 
+    Проверка ставится в очередь и выполняется в пуле процессов группой с другими проверками.
+    Успешный результат запоминается, повторная проверка той же пары не вычисляет хеш.
+    Неудачные проверки не кешируются и каждый раз проходят полное вычисление.
+
     :param str password: оригинальным пароль
     :param str hashed_password: хешированный пароль
     :return bool: True - если пароли совпадают, иначе False
     """
-    return bcrypt.checkpw(password.encode(), hashed_password.encode())
+    key: bytes = hmac.digest(_VERIFY_KEY, f"{hashed_password}\0{password}".encode(), "sha256")
+    if key in _verified:
+        return True
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _get_verify_queue().put_nowait((password, hashed_password, future))
+    result: bool = await future
+    if result:
+        _verified[key] = True
+    return result
+
+
+async def stop_verify_worker():
+    """Функция остановки фоновой задачи проверки паролей"""
+    global _verify_worker
+    if _verify_worker is not None and not _verify_worker.done():
+        _verify_worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await _verify_worker
+    _verify_worker = None
+
+
+def close_hash_pool():
+    """Функция завершения пула процессов хеширования паролей
+
+    Ожидает завершения выполняющихся вычислений. Вызывается при остановке приложения.
+    """
+    _HASH_POOL.shutdown()
+
+
+def get_right(user: User | None, model: ORM_MODEL) -> Right:
+    """Функция получения прав пользователя на ORM-модель
+
+    :param User | None user: объект User или None (неавторизованный пользователь)
+    :param ORM_MODEL model: ORM-модель, к которой осуществляется запрос
+    :raises HTTPException: ошибка, вызываемая при отсутствии прав на ORM-модель
+    :return Right: права пользователя на ORM-модель
+    """
+    if user is None:
+        rights: Mapping[str, Right] = Right.get_rights_for_anon()
+    else:
+        rights: Mapping[str, Right] = user.role.rights_by_model
+    right: Right | None = rights.get(model.__tablename__)
+    if right is None:
+        raise HTTPException(403, "You don't have permissions to access this resource")
+    return right
 
 
 async def check_permissions(
@@ -54,29 +268,25 @@ async def check_permissions(
 
     При запросе неавторизованного пользователя, ему автоматически назначаются минимальные права,
         описанные в схеме прав server.config.ROLE_RIGHTS_SCHEMA
+    Роль и права авторизованного пользователя должны быть загружены заранее
+        (см. server.crud.validate_token)
     """
-    if user is None:
-        rights: list[Right] = Right.get_rights_for_anon()
-    else:
-        role: Role = await user.awaitable_attrs.role
-        rights: list[Right] = role.rights
-    right: list = [right for right in rights if right.model == model.__tablename__]
-    if not right:
-        raise HTTPException(403, "You don't have permissions to access this resource")
-    right: Right = right[0]
-    permissions: list = [True]
+    tablename: str = model.__tablename__
+    right: Right = get_right(user=user, model=model)
 
-    if kwargs.pop("owner_only", None) and right.owner_only:
+    owner_only: bool = right.owner_only
+    if kwargs.pop("owner_only", None) and owner_only:
         if obj is None:
-            raise ValueError(f"Owner_only check required object {model.__tablename__}")
-        if not user.id == getattr(obj, model._owner_field):
+            raise ValueError(f"Owner_only check required object {tablename}")
+        user_id: int = user.id
+        if not user_id == getattr(obj, model._owner_field):
             raise HTTPException(403, "Action is available only for the owner")
 
-    for action in kwargs:
-        if hasattr(right, action):
-            flag: bool = getattr(right, action)
-            permissions.append(flag == kwargs[action] or flag)
-    if not all(permissions):
+    for action, expected in kwargs.items():
+        flag: bool | None = getattr(right, action, _MISSING)
+        # отсутствующее или неопределенное (None) право запрещает действие
+        if flag is not _MISSING and flag is not None and (flag == expected or flag):
+            continue
         if user is None:
             raise HTTPException(401, "Token authorization credentials were not provided")
         raise HTTPException(403, "You don't have permissions to access this resource")
@@ -0,0 +1,162 @@
+import logging
+from uuid import UUID
+
+from cachetools import TTLCache
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.orm import Session
+
+from server.config import (
+    DETAIL_CACHE_SIZE,
+    DETAIL_CACHE_TTL_SECONDS,
+    PAGE_CACHE_TTL_SECONDS,
+    REDIS_URL,
+    TOKEN_CACHE_SIZE,
+    TOKEN_CACHE_TTL_SECONDS,
+)
+from server.models import ORM_MODEL, Advertisement, Token, User
+
+# Кеш валидных токенов: UUID токена -> отсоединенный объект Token с загруженными
+# пользователем, ролью и правами
+token_cache: TTLCache[UUID, Token] = TTLCache(
+    maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS
+)
+# Кеш сериализованных профилей пользователей: идентификатор пользователя -> (JSON, ETag).
+# Записи удаляются вместе с токенами пользователя
+profile_cache: TTLCache[int, tuple[bytes, str]] = TTLCache(
+    maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL_SECONDS
+)
+# Кеш детальных представлений объектов: (ORM-модель, идентификатор) -> словарное представление.
+# Кеш локален для процесса: изменения из других процессов видны по истечении TTL
+detail_cache: TTLCache[tuple[ORM_MODEL, int], dict] = TTLCache(
+    maxsize=DETAIL_CACHE_SIZE, ttl=DETAIL_CACHE_TTL_SECONDS
+)
+# Общий для процессов кеш страниц списков: хеш Redis на ORM-модель, URL страницы -> JSON.
+# Хеш модели удаляется целиком при любом изменении ее записей или по истечении TTL,
+# отсчитываемого от создания хеша
+page_cache: Redis | None = Redis.from_url(REDIS_URL) if REDIS_URL else None
+_PAGE_CACHE_PREFIX: str = "pages:"
+
+logger = logging.getLogger(__name__)
+
+
+def detach_copy(obj: ORM_MODEL) -> ORM_MODEL:
+    """Функция создания отсоединенной копии объекта ORM-модели
+
+    Копия не привязана к сессии запроса, поэтому изменения исходного объекта не затрагивают
+    закешированное значение. Загруженные связи копируются вместе с объектом.
+
+    :param ORM_MODEL obj: объект ORM-модели
+    :return ORM_MODEL: отсоединенная копия объекта ORM-модели
+    """
+    with Session() as session:
+        return session.merge(obj, load=False)
+
+
+def get_user_profile(user: User) -> tuple[bytes, str]:
+    """Функция получения сериализованного профиля пользователя и его ETag
+
+    Профиль вычисляется один раз и хранится в кеше до изменения пользователя.
+
+    :param User user: объект пользователя
+    :return tuple[bytes, str]: JSON-представление пользователя и значение заголовка ETag
+    """
+    profile: tuple[bytes, str] | None = profile_cache.get(user.id)
+    if profile is None:
+        profile = profile_cache[user.id] = user.json_with_etag
+    return profile
+
+
+def invalidate_user_tokens(user_id: int) -> None:
+    """Функция удаления из кеша токенов и профиля пользователя
+
+    Вызывается при изменении или удалении пользователя.
+
+    :param int user_id: идентификатор пользователя
+    """
+    profile_cache.pop(user_id, None)
+    for key, token in list(token_cache.items()):
+        if token.id_user == user_id:
+            token_cache.pop(key, None)
+
+
+def invalidate_detail(model: ORM_MODEL, id: int) -> None:
+    """Функция удаления из кеша детального представления объекта
+
+    Вызывается при изменении или удалении объекта.
+
+    :param ORM_MODEL model: ORM-модель объекта
+    :param int id: идентификатор объекта
+    """
+    detail_cache.pop((model, id), None)
+
+
+def invalidate_user_advertisements(user_id: int) -> None:
+    """Функция удаления из кеша детальных представлений объявлений пользователя
+
+    Вызывается при удалении пользователя: его объявления удаляются каскадно.
+
+    :param int user_id: идентификатор пользователя
+    """
+    for key, value in list(detail_cache.items()):
+        if key[0] is Advertisement and value["id_user"] == user_id:
+            detail_cache.pop(key, None)
+
+
+async def get_cached_page(model: ORM_MODEL, url: str) -> bytes | None:
+    """Функция получения страницы списка из кеша
+
+    Недоступность Redis не прерывает обработку запроса: страница формируется заново.
+
+    :param ORM_MODEL model: ORM-модель списка
+    :param str url: URL запрошенной страницы
+    :return bytes | None: JSON-представление страницы или None
+    """
+    if page_cache is None:
+        return None
+    try:
+        return await page_cache.hget(f"{_PAGE_CACHE_PREFIX}{model.__tablename__}", url)
+    except RedisError:
+        logger.warning("Page cache is unavailable", exc_info=True)
+        return None
+
+
+async def set_cached_page(model: ORM_MODEL, url: str, body: bytes) -> None:
+    """Функция сохранения страницы списка в кеш
+
+    Время жизни задается только при создании хеша (EXPIRE NX, Redis 7.0+): запись новых
+    страниц не продлевает хранение уже закешированных.
+
+    :param ORM_MODEL model: ORM-модель списка
+    :param str url: URL запрошенной страницы
+    :param bytes body: JSON-представление страницы
+    """
+    if page_cache is None:
+        return
+    key: str = f"{_PAGE_CACHE_PREFIX}{model.__tablename__}"
+    try:
+        async with page_cache.pipeline() as pipe:
+            await pipe.hset(key, url, body).expire(key, PAGE_CACHE_TTL_SECONDS, nx=True).execute()
+    except RedisError:
+        logger.warning("Page cache is unavailable", exc_info=True)
+
+
+async def invalidate_pages(*models: ORM_MODEL) -> None:
+    """Функция удаления из кеша всех страниц списков ORM-моделей
+
+    Вызывается при создании, изменении или удалении записей.
+
+    :param ORM_MODEL models: ORM-модели, записи которых изменены
+    """
+    if page_cache is None:
+        return
+    try:
+        await page_cache.delete(*(f"{_PAGE_CACHE_PREFIX}{model.__tablename__}" for model in models))
+    except RedisError:
+        logger.warning("Page cache is unavailable", exc_info=True)
+
+
+async def close_page_cache() -> None:
+    """Функция закрытия соединений с Redis"""
+    if page_cache is not None:
+        await page_cache.aclose()
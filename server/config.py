@@ -1,4 +1,5 @@
 import os
+from types import MappingProxyType, SimpleNamespace
 
 # Параметры поключения к базе данных PostgreSQL
 POSTGRES_DB = os.getenv("POSTGRES_DB", "fastapiproject")
@@ -6,12 +7,47 @@ POSTGRES_USER = os.getenv("POSTGRES_NAME", "postgres")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "1111")
 POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
+# Параметры пула соединений с базой данных
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Время жизни соединения в пуле, после которого оно пересоздается (-1 - без ограничения)
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", 1800))
+
+# Режим применения миграций при запуске приложения:
+# sync - до начала обработки запросов, async - в фоне, skip - не применять
+MIGRATION_MODE = os.getenv("MIGRATION_MODE", "sync")
+if MIGRATION_MODE not in ("sync", "async", "skip"):
+    raise ValueError(
+        f"Invalid MIGRATION_MODE={MIGRATION_MODE!r}, expected one of: 'sync', 'async', 'skip'"
+    )
 
 # Параметры пагинации
 VALUES_ON_PAGE = int(os.getenv("VALUES_ON_PAGE", 5))
 
 # Параметры аутентификации
 TOKEN_TTL_HOURS = int(os.getenv("TOKEN_TTL_HOURS", 48))
+# Параметры хеширования паролей Argon2id (по умолчанию - минимальная конфигурация OWASP)
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 2))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 19 * 1024))
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", 1))
+# Количество процессов пула хеширования паролей (0 - по числу ядер CPU)
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", 0))
+# Максимальное количество паролей, проверяемых одним процессом пула за одно задание
+# (по умолчанию - каждая проверка выполняется отдельным заданием)
+VERIFY_BATCH_SIZE = int(os.getenv("VERIFY_BATCH_SIZE", 1))
+# Количество запоминаемых успешных проверок паролей
+VERIFY_CACHE_SIZE = int(os.getenv("VERIFY_CACHE_SIZE", 4096))
+# Параметры кеширования валидных токенов в памяти процесса
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10_000))
+TOKEN_CACHE_TTL_SECONDS = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", 60))
+# Параметры кеширования детальных представлений объектов в памяти процесса
+DETAIL_CACHE_SIZE = int(os.getenv("DETAIL_CACHE_SIZE", 10_000))
+DETAIL_CACHE_TTL_SECONDS = int(os.getenv("DETAIL_CACHE_TTL_SECONDS", 30))
+# Параметры кеширования страниц списков в Redis (без REDIS_URL кеширование отключено)
+REDIS_URL = os.getenv("REDIS_URL")
+PAGE_CACHE_TTL_SECONDS = int(os.getenv("PAGE_CACHE_TTL_SECONDS", 60))
+# Периодичность удаления просроченных токенов (0 - отключить)
+TOKEN_CLEANUP_INTERVAL_SECONDS = int(os.getenv("TOKEN_CLEANUP_INTERVAL_SECONDS", 3600))
 
 # Параметры прав
 # На основании данной схемы при миграции бд заполняются таблицы Role и Right,
@@ -53,3 +89,13 @@ ROLE_RIGHTS_SCHEMA = [
         ],
     },
 ]
+
+# Права неавторизованного пользователя, подготовленные при импорте модуля
+ANON_RIGHTS: MappingProxyType = MappingProxyType(
+    {
+        right["model"]: SimpleNamespace(**right)
+        for role in ROLE_RIGHTS_SCHEMA
+        if role["name"] == "anon"
+        for right in role["rights"]
+    }
+)
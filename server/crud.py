@@ -3,19 +3,23 @@ from uuid import UUID
 
 import sqlalchemy as sq
 from fastapi import HTTPException
-from sqlalchemy import Select
+from sqlalchemy import Delete, Result, Select, Update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
+from server.cache import detach_copy, token_cache
 from server.config import TOKEN_TTL_HOURS
 from server.filters import FilterSet
-from server.models import ORM_MODEL, Token, User
-from server.pagination import Paginator
+from server.models import ORM_MODEL, Role, Token, User
+from server.pagination import Keyset, Paginator
 
 
 class Database:
     """Класс для выполнения CRUD-запросов к базе данных"""
 
+    __slots__ = ("_session", "_model")
+
     def __init__(self, session: AsyncSession, model: ORM_MODEL):
         self._session = session
         self._model = model
@@ -33,30 +37,52 @@ class Database:
         except IntegrityError:
             raise HTTPException(409, f"{self._model.__tablename__} already exists")
 
-    async def _calculate_quantity(self, query: Select) -> int:
+    async def _calculate_quantity(self, query: Select, params: dict = None) -> int:
         """Метод посчета количества записей
 
         :param Select query: объект запроса, количество записей которого нужно подсчитать
+        :param dict params: значения параметров запроса, defaults to None
         :return int: количество записей
         """
         query: Select = sq.select(sq.func.count()).select_from(query.subquery())
-        return await self._session.scalar(query)
+        return await self._session.scalar(query, params)
 
-    async def get_list(self, paginator: Paginator, filterset: FilterSet = None) -> list[ORM_MODEL]:
+    async def get_list(self, paginator: Paginator, filterset: FilterSet = None) -> list[dict]:
         """Метод получения записей
 
+        Выбираются только столбцы словарного представления модели (ORM_MODEL._dict_fields),
+        строки возвращаются словарями без создания объектов ORM-модели.
+
         :param Paginator paginator: объект класса для пагинации данных
         :param FilterSet filterset: объект класса для фильтрации данных, defaults to None
-        :return list[ORM_MODEL]: список полученных объектов ORM-модели
+        :return list[dict]: список словарных представлений записей
         """
-        query: Select = sq.select(self._model)
+        query: Select = sq.select(*self._model._dict_columns)
+        params: dict = {}
         if filterset is not None:
             query: Select = filterset.filter_query(query=query)
-
-        quantity_objects: int = await self._calculate_quantity(query=query)
+            params: dict = filterset.filter_params
+
+        keyset: Keyset | None = filterset.get_keyset() if filterset is not None else None
+        counted_query: Select | None = paginator.paginate_query_with_total(
+            query=query, keyset=keyset
+        )
+        if counted_query is not None:
+            # Записи страницы и их общее количество выбираются одним запросом
+            result: Result = await self._session.execute(counted_query, params)
+            rows: list = result.all()
+            if rows:
+                paginator.quantity_objects = rows[0][-1]
+                keys: list[str] = list(result.keys())[:-1]
+                return [dict(zip(keys, row)) for row in rows]
+
+        quantity_objects: int = await self._calculate_quantity(query=query, params=params)
         paginator.quantity_objects = quantity_objects
-        query: Select = paginator.paginate_query(query=query)
-        return await self._session.scalars(query)
+        if not quantity_objects:
+            return []
+        query: Select = paginator.paginate_query(query=query, keyset=keyset)
+        result: Result = await self._session.execute(query, params)
+        return list(map(dict, result.mappings()))
 
     async def get_detail(self, id: int) -> ORM_MODEL:
         """Метод получения одной записи
@@ -80,28 +106,61 @@ class Database:
         await self._save_changes(obj=obj)
         return obj
 
-    async def update(self, obj: ORM_MODEL, validated_data: dict) -> ORM_MODEL:
-        """Метод частичного обновления записи
+    async def update_by_id(
+        self, id: int, validated_data: dict, owner_id: int | None = None
+    ) -> dict | None:
+        """Метод частичного обновления записи по идентификатору одним запросом UPDATE ... RETURNING
 
-        :param ORM_MODEL obj: объект ORM-модели для частичного обновления
-        :param dict validated_data: данные для обновления ORM-модели
-        :return ORM_MODEL: обновленный объект ORM-модели
+        Обновленная запись возвращается в словарном представлении (ORM_MODEL._dict_fields)
+        без создания объекта ORM-модели.
+
+        :param int id: идентификатор записи
+        :param dict validated_data: данные для обновления записи
+        :param int | None owner_id: идентификатор владельца записи (поле ORM_MODEL._owner_field),
+            при передаче обновляется только запись этого владельца, defaults to None
+        :raises HTTPException: ошибка, вызываемая при возникновения конфликтов уникальных полей
+        :return dict | None: словарное представление записи или None, если запись не обновлена
         """
-        for attr, value in validated_data.items():
-            setattr(obj, attr, value)
-        await self._save_changes(obj=obj)
-        await self._session.refresh(instance=obj)
-        return obj
+        condition = self._model.id == id
+        if owner_id is not None:
+            condition = condition & (getattr(self._model, self._model._owner_field) == owner_id)
+        if not validated_data:
+            # Обновлять нечего: запись только выбирается с теми же условиями
+            query: Select = sq.select(*self._model._dict_columns).where(condition)
+            result: Result = await self._session.execute(query)
+            row = result.mappings().one_or_none()
+            return dict(row) if row is not None else None
+        query: Update = (
+            sq.update(self._model)
+            .where(condition)
+            .values(validated_data)
+            .returning(*self._model._dict_columns)
+        )
+        try:
+            result: Result = await self._session.execute(query)
+        except IntegrityError:
+            await self._session.rollback()
+            raise HTTPException(409, f"{self._model.__tablename__} already exists")
+        row = result.mappings().one_or_none()
+        await self._save_changes()
+        return dict(row) if row is not None else None
+
+    async def delete_by_id(self, id: int, owner_id: int | None = None) -> bool:
+        """Метод удаления записи по идентификатору одним запросом DELETE
 
-    async def delete(self, obj: ORM_MODEL) -> ORM_MODEL:
-        """Метод удаления записи
+        Связанные записи удаляются каскадно на стороне базы данных (ondelete="CASCADE").
 
-        :param ORM_MODEL obj: объект ORM-модели для удаления
-        :return ORM_MODEL: удаленный объект ORM-модели
+        :param int id: идентификатор записи
+        :param int | None owner_id: идентификатор владельца записи (поле ORM_MODEL._owner_field),
+            при передаче удаляется только запись этого владельца, defaults to None
+        :return bool: True - если запись удалена, иначе False
         """
-        await self._session.delete(instance=obj)
+        query: Delete = sq.delete(self._model).where(self._model.id == id)
+        if owner_id is not None:
+            query: Delete = query.where(getattr(self._model, self._model._owner_field) == owner_id)
+        deleted_id: int | None = await self._session.scalar(query.returning(self._model.id))
         await self._save_changes()
-        return obj
+        return deleted_id is not None
 
 
 async def get_user_by_username(session: AsyncSession, username: str) -> User:
@@ -122,16 +181,44 @@ async def get_user_by_username(session: AsyncSession, username: str) -> User:
 async def validate_token(session: AsyncSession, token: UUID) -> Token:
     """Функция валидации токена
 
+    Вместе с токеном одним запросом загружаются пользователь, его роль и права,
+    необходимые для последующей проверки доступа в server.auth.check_permissions.
+    Токен выбирается только по уникальному индексу, срок действия проверяется после загрузки.
+    Валидные токены кешируются в server.cache.token_cache: при попадании в кеш
+    обращения к базе данных не происходит.
+
     :param AsyncSession session: объект асинхронной сессии
     :param UUID token: токен для валидации
     :raises HTTPException: ошибка, вызываемая при ошибке валидации
     :return Token: валидный токен
     """
-    query: Select = sq.select(Token).where(
-        Token.token == token,
-        Token.created_at >= datetime.now() - timedelta(hours=TOKEN_TTL_HOURS),
+    expiration: datetime = datetime.now() - timedelta(hours=TOKEN_TTL_HOURS)
+    cached_token: Token | None = token_cache.get(token)
+    if cached_token is not None:
+        if cached_token.created_at >= expiration:
+            return await session.merge(cached_token, load=False)
+        token_cache.pop(token, None)
+
+    query: Select = (
+        sq.select(Token)
+        .options(joinedload(Token.user).joinedload(User.role).joinedload(Role.rights))
+        .where(Token.token == token)
     )
-    token: Token | None = await session.scalar(query)
-    if token:
-        return token
+    result = await session.scalars(query)
+    validated_token: Token | None = result.unique().one_or_none()
+    if validated_token is not None and validated_token.created_at >= expiration:
+        token_cache[token] = detach_copy(validated_token)
+        return validated_token
     raise HTTPException(401, "The provided authorization token is invalid")
+
+
+async def delete_expired_tokens(session: AsyncSession) -> int:
+    """Функция удаления токенов с истекшим сроком действия
+
+    :param AsyncSession session: объект асинхронной сессии
+    :return int: количество удаленных токенов
+    """
+    expiration: datetime = datetime.now() - timedelta(hours=TOKEN_TTL_HOURS)
+    result = await session.execute(sq.delete(Token).where(Token.created_at < expiration))
+    await session.commit()
+    return result.rowcount
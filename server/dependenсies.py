@@ -1,34 +1,67 @@
-from typing import Annotated, AsyncGenerator, TypeAlias
+from functools import cache
+from typing import Annotated, AsyncGenerator, Callable, TypeAlias
+from uuid import UUID
 
-from fastapi import Depends, Header
+from fastapi import Depends, Header, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from server.crud import validate_token
-from server.models import Session, Token, User
-from server.schema import AuthParams
+from server.crud import Database, validate_token
+from server.models import ORM_MODEL, Session, Token, User
+from server.schema import AuthParams, QueryParams
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    """Зависимость асинхронной сессии"""
-    session: AsyncSession = Session()
-    try:
+    """Зависимость асинхронной сессии
+
+    Изменения фиксируются явно методами server.crud.Database, поэтому сессия закрывается
+    без дополнительной транзакции вокруг запроса.
+    """
+    async with Session() as session:
         yield session
-    finally:
-        await session.close()
 
 
 SessionDependency: TypeAlias = Annotated[AsyncSession, Depends(get_session, use_cache=True)]
+QueryParamsDependency: TypeAlias = Annotated[QueryParams, Query()]
+AuthDependency: TypeAlias = Annotated[AuthParams, Header()]
+
+
+@cache
+def get_database(model: ORM_MODEL) -> Callable[[AsyncSession], Database]:
+    """Фабрика зависимостей объекта Database для ORM-модели
+
+    Для каждой модели создается одна функция-зависимость, поэтому FastAPI кеширует
+    объект Database в пределах запроса так же, как и сессию.
+
+    :param ORM_MODEL model: ORM-модель, к которой осуществляются запросы
+    :return Callable[[AsyncSession], Database]: зависимость объекта Database
+    """
+
+    def dependency(session: SessionDependency) -> Database:
+        return Database(session=session, model=model)
+
+    return dependency
 
 
 async def get_user(
-    auth: Annotated[AuthParams, Header()], session: SessionDependency
+    session: SessionDependency, authorization: Annotated[str | None, Header()] = None
 ) -> User | None:
     """Зависимость авторизации
 
-    :param Annotated[AuthParams, Header auth: namedtuple параметров заголовка авторизации
+    Заголовок авторизации разбирается напрямую, без построения модели server.schema.AuthParams.
+
     :param SessionDependency session: объект асинхронной сессии
+    :param Annotated[str | None, Header] authorization: заголовок авторизации, defaults to None
+    :raises HTTPException: ошибка, вызываемая при некорректном формате токена
     :return User | None: объект User при наличии валидного токена в заголовке, иначе None
     """
-    if auth.token is not None:
-        token: Token = await validate_token(session=session, token=auth.token)
-        return token.user
+    if authorization is None:
+        return None
+    auth_type, _, auth_data = authorization.strip().partition(" ")
+    if auth_type != "Token":
+        return None
+    try:
+        token_value: UUID = UUID(auth_data.strip())
+    except ValueError:
+        raise HTTPException(401, "Invalid token format")
+    token: Token = await validate_token(session=session, token=token_value)
+    return token.user
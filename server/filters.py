@@ -1,13 +1,66 @@
+import operator
 from abc import ABC, abstractmethod
-from functools import singledispatchmethod
-from typing import NamedTuple, TypeAlias
+from functools import cache, lru_cache
+from typing import TYPE_CHECKING, Callable, ClassVar, NamedTuple, TypeAlias
 
 import sqlalchemy as sq
-from sqlalchemy import Select
-from sqlalchemy.orm.attributes import InstrumentedAttribute
-from sqlalchemy.sql.elements import BinaryExpression, UnaryExpression
+from cachetools import LRUCache
+from sqlalchemy.sql.operators import ColumnOperators
 
 from server.models import ORM_MODEL
+from server.pagination import Keyset
+
+if TYPE_CHECKING:
+    from sqlalchemy import Select
+    from sqlalchemy.orm.attributes import InstrumentedAttribute
+    from sqlalchemy.sql.elements import BinaryExpression, ColumnElement, UnaryExpression
+
+
+# Префиксы направления упорядочивания: (направление, длина префикса)
+_DIRECTIONS: dict[str, tuple[str, int]] = {"-": ("desc", 1), "+": ("asc", 1)}
+
+
+def _get_param_name(search_param: str | int) -> str:
+    """Функция формирования названия параметра запроса для значения поиска
+
+    :param str | int search_param: значение параметра поиска
+    :return str: название параметра запроса
+    """
+    return f"search_{type(search_param).__name__}"
+
+
+@cache
+def _build_search_meta(
+    model: ORM_MODEL, search_fields: tuple[str] | None
+) -> "tuple[tuple[InstrumentedAttribute, type], ...]":
+    """Функция получения полей поиска ORM-модели и их python-типов
+
+    Результат неизменен для пары (модель, поля поиска) и кешируется.
+
+    :param ORM_MODEL model: ORM-модель, к которой осуществляется запрос
+    :param tuple[str] | None search_fields: поля ORM-модели, по которым проводится поиск
+    :return tuple[tuple[InstrumentedAttribute, type], ...]: пары (поле, python-тип поля)
+    """
+    fields: tuple[InstrumentedAttribute, ...] = tuple(
+        getattr(model, field) for field in search_fields or ()
+    )
+    return tuple((field, field.type.python_type) for field in fields)
+
+
+def _parse_int(value: str) -> int | None:
+    """Функция приведения значения параметра поиска к целому числу
+
+    :param str value: значение параметра поиска
+    :return int | None: целое число или None, если значение не является записью целого числа
+    """
+    digits: str = value[1:] if value[:1] in ("+", "-") else value
+    if not digits.isdecimal():
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        # превышен лимит длины целочисленной строки (sys.get_int_max_str_digits)
+        return None
 
 
 class OrderingField(NamedTuple):
@@ -15,9 +68,33 @@ class OrderingField(NamedTuple):
     direction: str
 
 
+@lru_cache(maxsize=512)
+def _resolve_order(
+    model: ORM_MODEL, field: str
+) -> "InstrumentedAttribute | UnaryExpression | None":
+    """Функция валидации и преобразования параметра упорядочивания в условие order_by
+
+    Результат зависит только от модели и параметра упорядочивания и кешируется.
+
+    :param ORM_MODEL model: ORM-модель, к которой осуществляется запрос
+    :param str field: параметр упорядочивания
+    :return InstrumentedAttribute | UnaryExpression | None: условие упорядочивания или None
+    """
+    direction, offset = _DIRECTIONS.get(field[:1], ("asc", 0))
+    ordering_field = OrderingField(field[offset:], direction)
+    if ordering_field.field not in model._column_names:
+        return None
+    expression: InstrumentedAttribute = getattr(model, ordering_field.field)
+    if ordering_field.direction == "desc":
+        return expression.desc()
+    return expression
+
+
 class BaseFilter(ABC):
     """Базовый класс для классов-фильтрации"""
 
+    __slots__ = ()
+
     @abstractmethod
     def get_filter_conditions(self) -> list:
         pass
@@ -34,73 +111,78 @@ class SearchFilter(BaseFilter):
     :searching_param: параметр фильтрации, переданный в query-string
     """
 
+    __slots__ = ("_model", "_search_fields", "_searching_param", "_meta")
+
+    # Операторы условий поиска в зависимости от типа значения параметра поиска
+    _DISPATCH: ClassVar[dict[type, Callable]] = {
+        str: ColumnOperators.icontains,
+        int: operator.eq,
+    }
+
     def __init__(self, model: ORM_MODEL, search_fields: tuple[str], searching_param: str | None):
         self._model: ORM_MODEL = model
         self._search_fields: tuple[str] = search_fields
         self._searching_param: str | None = searching_param
+        self._meta: tuple[tuple[InstrumentedAttribute, type], ...] = _build_search_meta(
+            model, search_fields
+        )
 
-    @singledispatchmethod
-    def _get_condition(self, search_param):
-        """Метод одиночной диспетчеризации"""
-        raise NotImplementedError(f"Not implemented for {type(search_param)}")
+    def _get_condition(
+        self, search_param: str | int, field: "InstrumentedAttribute"
+    ) -> "BinaryExpression":
+        """Метод формирования условия поиска по полю
 
-    @_get_condition.register
-    def _(self, search_param: str, field: InstrumentedAttribute) -> BinaryExpression:
-        """Обработчик метода одиночной диспетчеризации
+        Значение поиска в условие не подставляется: используется именованный параметр,
+        значение которого передается при выполнении запроса (см. get_filter_params).
 
-        :param str search_param: значение параметра поиска типа STR
+        :param str | int search_param: значение параметра поиска типа STR или INT
         :param InstrumentedAttribute field: поле поиска
         :return BinaryExpression: условие SQLAlchemy для использования в where фильтре
         """
-        return field.icontains(search_param)
+        param = sq.bindparam(_get_param_name(search_param), type_=field.type)
+        return self._DISPATCH[type(search_param)](field, param)
 
-    @_get_condition.register
-    def _(self, search_param: int, field: InstrumentedAttribute) -> BinaryExpression:
-        """Обработчик метода одиночной диспетчеризации
+    def _get_search_params(self) -> "list[tuple[InstrumentedAttribute, str | int]]":
+        """Метод получения полей поиска и соответствующих им значений параметра поиска
 
-        :param str search_param: значение параметра поиска типа INT
-        :param InstrumentedAttribute field: поле поиска
-        :return BinaryExpression: условие фильтрации
-        """
-        return field == int(search_param)
+        Значение параметра поиска приводится к целому числу один раз для всех полей.
+        Поля, к типу которых значение параметра поиска не приводится, пропускаются.
 
-    def _convert_searching_param(
-        self, search_param: str, field_type: str | int
-    ) -> str | int | None:
-        """Метод пребразования значения параметра поиска в тип, соответствующий типу поля ORM-модели
-
-        :param str search_param: значение параметра поиска типа STR
-        :param str | int field_type: тип поля ORM-модели
-        :return str | int | None: значение параметра поиска, соответствующее типу поля ORM-модели
-            или None
+        :return list[tuple[InstrumentedAttribute, str | int]]: список пар (поле, значение)
         """
-        if not isinstance(search_param, field_type):
-            try:
-                search_param: int = field_type(search_param)
-            except ValueError:
-                return
-        return search_param
-
-    def get_filter_conditions(self) -> list[BinaryExpression]:
+        param_str: str = self._searching_param
+        param_int: int | None = _parse_int(param_str)
+        search_params = []
+        for field, field_type in self._meta:
+            search_param: str | int | None = param_int if field_type is int else param_str
+            if search_param is None:
+                continue
+            search_params.append((field, search_param))
+        return search_params
+
+    def get_filter_conditions(self) -> "list[BinaryExpression]":
         """Метод формирования условий фильтрации
 
         :return list[BinaryExpression]: список условий
         """
         conditions = []
         if self._searching_param is not None:
-            for field in self._search_fields:
-                field: InstrumentedAttribute = getattr(self._model, field)
-                field_type: str | int = field.type.python_type
-                search_param: str | int | None = self._convert_searching_param(
-                    self._searching_param, field_type
-                )
-                if search_param is None:
-                    continue
+            for field, search_param in self._get_search_params():
                 conditions.append(self._get_condition(search_param, field))
-        else:
-            conditions.append(True)
         return conditions
 
+    def get_filter_params(self) -> dict[str, str | int]:
+        """Метод формирования значений параметров, используемых в условиях фильтрации
+
+        :return dict[str, str | int]: словарь значений с ключами - названиями параметров
+        """
+        if self._searching_param is None:
+            return {}
+        return {
+            _get_param_name(search_param): search_param
+            for _, search_param in self._get_search_params()
+        }
+
 
 class OrderingFilter(BaseFilter):
     """Класс фильтрации, осуществляющий упорядочивание результатов по полям ORM-моделей
@@ -114,84 +196,144 @@ class OrderingFilter(BaseFilter):
     :ordering_params: параметры упорядочивания, переданные в query-string
     """
 
+    __slots__ = ("_model", "_ordering_params")
+
     def __init__(self, model: ORM_MODEL, ordering_params: tuple[str] | None):
         self._model: ORM_MODEL = model
         self._ordering_params: tuple[str] | None = ordering_params
 
-    def _check_field(self, field: str) -> OrderingField | None:
-        """Метод валидации и преобразования полученных параметров упорядочивания
-
-        :param str field: параметр упорядочивания
-        :return OrderingField | None: подготовленный параметр упорядочивания или None
-        """
-        if field[0] == "-":
-            direction, tmp_field = "desc", field[1:]
-        elif field[0] == "+":
-            direction, tmp_field = "asc", field[1:]
-        else:
-            direction, tmp_field = "asc", field
-        if tmp_field in self._model.__table__.columns:
-            return OrderingField(tmp_field, direction)
-
-    def get_filter_conditions(self) -> list[InstrumentedAttribute | UnaryExpression]:
+    def get_filter_conditions(self) -> "list[InstrumentedAttribute | UnaryExpression]":
         """Метод формирования условий упорядочивания
 
         :return list[InstrumentedAttribute | UnaryExpression]: список условий
         """
-        conditions = []
-        if self._ordering_params is not None:
-            for field in self._ordering_params:
-                validated_field: OrderingField | None = self._check_field(field=field)
-                if validated_field is None:
-                    continue
-                expression: InstrumentedAttribute = getattr(self._model, validated_field.field)
-                if validated_field.direction == "desc":
-                    expression = expression.desc()
-                conditions.append(expression)
-        return conditions
+        if self._ordering_params is None:
+            return []
+        return [
+            expression
+            for field in self._ordering_params
+            if (expression := _resolve_order(self._model, field)) is not None
+        ]
+
+
+# Кеш условий фильтрации и упорядочивания по форме запроса (см. FilterSet._get_clauses)
+_clauses_cache: LRUCache = LRUCache(maxsize=256)
 
 
 class FilterSet:
     """Класс-набор фильтров"""
 
+    __slots__ = (
+        "_model",
+        "_ordering_params",
+        "_searching_param",
+        "_search_fields",
+        "search_filter",
+        "filter_params",
+    )
+
     search_filter_cls = SearchFilter
     ordering_filter_cls = OrderingFilter
 
-    def __init__(self, model: ORM_MODEL, search_fields: tuple[str], filter_params: dict):
+    def __init__(
+        self,
+        model: ORM_MODEL,
+        search_fields: tuple[str],
+        *,
+        search: str | None = None,
+        order_by: tuple[str] | None = None,
+    ):
         self._model: ORM_MODEL = model
-        self._ordering_params: tuple[str] | None = filter_params.get("order_by")
-        self._searching_param: str | None = filter_params.get("search")
+        # параметры упорядочивания входят в ключ кеша условий и должны быть хешируемыми
+        self._ordering_params: tuple[str] | None = (
+            tuple(order_by) if order_by is not None else None
+        )
+        self._searching_param: str | None = search
         self._search_fields: tuple[str] = search_fields
-
-    @property
-    def search_filter(self):
-        """Свойство создания объекта self.search_filter_cls
-
-        :return _type_: объект self.search_filter_cls
-        """
-        return self.search_filter_cls(
+        self.search_filter: SearchFilter = self.search_filter_cls(
             model=self._model,
             search_fields=self._search_fields,
             searching_param=self._searching_param,
         )
+        self.filter_params: dict[str, str | int] = self.search_filter.get_filter_params()
+
+    def _get_clauses(self) -> "tuple[ColumnElement | None, tuple]":
+        """Метод получения условий фильтрации и упорядочивания
 
-    @property
-    def ordering_filter(self):
-        """Свойство создания объекта self.ordering_filter_cls
+        Условия зависят только от формы запроса (модель, поля поиска, набор параметров поиска,
+        параметры упорядочивания), поэтому кешируются и переиспользуются между запросами.
+        Значения параметров поиска передаются при выполнении запроса через self.filter_params.
 
-        :return _type_: объект self.ordering_filter_cls
+        :return tuple[ColumnElement | None, tuple]: условие where (или None) и условия order_by
         """
-        return self.ordering_filter_cls(model=self._model, ordering_params=self._ordering_params)
+        search_shape: tuple[str] | None = (
+            tuple(sorted(self.filter_params)) if self._searching_param is not None else None
+        )
+        key: tuple = (
+            type(self),
+            self._model,
+            self._search_fields,
+            search_shape,
+            self._ordering_params,
+        )
+        clauses: tuple[ColumnElement | None, tuple] | None = _clauses_cache.get(key)
+        if clauses is None:
+            where_clause: ColumnElement | None = None
+            if self._searching_param is not None:
+                # поиск без подходящих полей не должен возвращать записи
+                conditions: list = self.search_filter.get_filter_conditions()
+                where_clause = sq.or_(*conditions) if conditions else sq.false()
+            ordering_filter: OrderingFilter = self.ordering_filter_cls(
+                model=self._model, ordering_params=self._ordering_params
+            )
+            clauses = (where_clause, tuple(ordering_filter.get_filter_conditions()))
+            _clauses_cache[key] = clauses
+        return clauses
+
+    def get_keyset(self) -> Keyset | None:
+        """Метод получения упорядочивания для постраничного вывода по курсору
+
+        Вывод по курсору возможен при упорядочивании по одному столбцу модели.
+
+        :return Keyset | None: описание упорядочивания или None
+        """
+        if self._ordering_params is None or len(self._ordering_params) != 1:
+            return None
+        token: str = self._ordering_params[0]
+        direction, offset = _DIRECTIONS.get(token[:1], ("asc", 0))
+        field: str = token[offset:]
+        if field not in self._model._column_names:
+            return None
+        row_keys: dict[str, str] = {attr: key for key, attr in self._model._dict_fields}
+        if "id" not in row_keys:
+            return None
+        return Keyset(
+            column=getattr(self._model, field),
+            id_column=self._model.id,
+            descending=direction == "desc",
+            row_key=row_keys.get(field),
+            id_key=row_keys["id"],
+            token=token,
+        )
 
-    def filter_query(self, query: Select) -> Select:
+    def filter_query(self, query: "Select") -> "Select":
         """Метод преобразования объекта запроса, добавляющий условия фильтрации
 
+        Условия поиска и упорядочивания добавляются только при наличии соответствующих параметров.
+        Значения параметров поиска необходимо передать при выполнении запроса:
+            session.scalars(filterset.filter_query(query), filterset.filter_params)
+
         :param Select query: объект запроса
         :return Select: преобразованный объект запроса
         """
-        return query.where(sq.or_(False, *self.search_filter.get_filter_conditions())).order_by(
-            *self.ordering_filter.get_filter_conditions()
-        )
+        if self._searching_param is None and self._ordering_params is None:
+            return query
+        where_clause, ordering_conditions = self._get_clauses()
+        if where_clause is not None:
+            query = query.where(where_clause)
+        if ordering_conditions:
+            query = query.order_by(*ordering_conditions)
+        return query
 
 
 FILTERSET_CLASS: TypeAlias = FilterSet
@@ -1,9 +1,61 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
-from server.models import close_orm
-from contextlib import asynccontextmanager
+from sqlalchemy.exc import SQLAlchemyError
+
+from server.auth import close_hash_pool, stop_verify_worker
+from server.cache import close_page_cache
+from server.config import MIGRATION_MODE, TOKEN_CLEANUP_INTERVAL_SECONDS
+from server.crud import delete_expired_tokens
+from server.migrations import migration_status, run_migrations, run_migrations_in_background
+from server.models import Session, close_orm
+
+logger = logging.getLogger(__name__)
+
+
+async def cleanup_expired_tokens(interval: int):
+    """Фоновая задача периодического удаления просроченных токенов
+
+    :param int interval: интервал между запусками очистки в секундах
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with Session() as session:
+                await delete_expired_tokens(session)
+        except (SQLAlchemyError, OSError):
+            logger.exception("Expired tokens cleanup failed")
+
+
+async def cancel_task(task: asyncio.Task | None):
+    """Функция отмены фоновой задачи
+
+    :param asyncio.Task | None task: фоновая задача
+    """
+    if task is not None:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    migration_task: asyncio.Task | None = None
+    if MIGRATION_MODE == "sync":
+        await run_migrations()
+    elif MIGRATION_MODE == "async":
+        migration_task = asyncio.create_task(run_migrations_in_background())
+    elif MIGRATION_MODE == "skip":
+        migration_status.phase = "skipped"
+    cleanup_task: asyncio.Task | None = None
+    if TOKEN_CLEANUP_INTERVAL_SECONDS > 0:
+        cleanup_task = asyncio.create_task(cleanup_expired_tokens(TOKEN_CLEANUP_INTERVAL_SECONDS))
     yield
+    await cancel_task(cleanup_task)
+    await cancel_task(migration_task)
+    await stop_verify_worker()
     await close_orm()
+    await close_page_cache()
+    close_hash_pool()
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+import sqlalchemy as sq
+from alembic import command
+from alembic.config import Config
+
+from server.models import engine
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI: Path = Path(__file__).resolve().parent.parent / "alembic.ini"
+# Ключ advisory-блокировки PostgreSQL: миграции выполняет только один воркер одновременно
+MIGRATION_LOCK_ID = 7_316_421_905
+
+PHASE = Literal["pending", "running", "succeeded", "failed", "skipped"]
+
+
+@dataclass
+class MigrationStatus:
+    """Состояние применения миграций базы данных при запуске приложения
+
+    :phase: текущая стадия применения миграций
+    :error: описание ошибки, если миграции завершились неудачно
+    """
+
+    phase: PHASE = "pending"
+    error: str | None = None
+
+
+migration_status = MigrationStatus()
+
+
+def _upgrade_head():
+    """Функция применения миграций alembic до последней версии"""
+    config = Config(ALEMBIC_INI)
+    # логирование уже настроено сервером приложения
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+
+async def run_migrations():
+    """Функция применения миграций с блокировкой от параллельного запуска в других воркерах
+
+    Alembic выполняется в отдельном потоке, так как alembic/env.py запускает собственный
+    цикл событий.
+
+    :raises Exception: ошибка, возникшая при применении миграций
+    """
+    migration_status.phase = "running"
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(sq.select(sq.func.pg_advisory_lock(MIGRATION_LOCK_ID)))
+            try:
+                await asyncio.to_thread(_upgrade_head)
+            finally:
+                await connection.execute(
+                    sq.select(sq.func.pg_advisory_unlock(MIGRATION_LOCK_ID))
+                )
+    except Exception as error:
+        migration_status.phase, migration_status.error = "failed", repr(error)
+        raise
+    migration_status.phase = "succeeded"
+
+
+async def run_migrations_in_background():
+    """Фоновая задача применения миграций: ошибка фиксируется в migration_status"""
+    try:
+        await run_migrations()
+    except Exception:
+        logger.exception("Database migrations failed")
@@ -1,19 +1,30 @@
 from datetime import datetime
-from functools import lru_cache
-from typing import Literal, Self, TypeAlias
+from functools import cached_property
+from hashlib import blake2b
+from types import SimpleNamespace
+from typing import Callable, ClassVar, Literal, Mapping, TypeAlias
 from uuid import UUID
 
+import orjson
 import sqlalchemy as sq
-from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncAttrs,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 from server.config import (
+    ANON_RIGHTS,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE_SECONDS,
+    DB_POOL_SIZE,
     POSTGRES_DB,
     POSTGRES_HOST,
     POSTGRES_PASSWORD,
     POSTGRES_PORT,
     POSTGRES_USER,
-    ROLE_RIGHTS_SCHEMA,
 )
 
 DSN = (
@@ -21,15 +32,85 @@ DSN = (
     f"{POSTGRES_PASSWORD}@{POSTGRES_HOST}:"
     f"{POSTGRES_PORT}/{POSTGRES_DB}"
 )
-engine = create_async_engine(url=DSN)
-Session = async_sessionmaker(bind=engine, expire_on_commit=False)
+engine = create_async_engine(
+    url=DSN,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_pre_ping=False,
+    # соединения пересоздаются до того, как их закроет сервер или промежуточный балансировщик
+    pool_recycle=DB_POOL_RECYCLE_SECONDS,
+    # LRU-кеш скомпилированных выражений SQLAlchemy, общий для всех сессий
+    query_cache_size=1000,
+    connect_args={
+        # кеш подготовленных выражений asyncpg и SQLAlchemy на каждое соединение
+        "statement_cache_size": 1024,
+        "prepared_statement_cache_size": 1024,
+        # JIT не окупается на коротких OLTP-запросах
+        "server_settings": {"jit": "off"},
+    },
+)
+Session = async_sessionmaker(
+    bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+)
 
 ROLE = Literal["admin", "user"]
 MODEL = Literal["Role", "Right", "User", "Advertisement", "Token"]
 
 
+def _gen_dumper(cls: type) -> Callable[[object], dict]:
+    """Функция генерации функции словарного представления объектов ORM-модели
+
+    По полям cls._dict_fields один раз на класс компилируется функция вида
+        def dump(obj): return {"id": obj.id, "created_at": obj.created_at.isoformat(), ...}
+    Значения колонок типа datetime приводятся к строке в формате ISO 8601.
+
+    :param type cls: ORM-модель
+    :return Callable[[object], dict]: функция словарного представления объекта
+    """
+    table: sq.Table | None = getattr(cls, "__table__", None)
+    items: list[str] = []
+    for key, attr in cls._dict_fields:
+        column: sq.Column | None = table.columns.get(attr) if table is not None else None
+        is_datetime: bool = column is not None and column.type.python_type is datetime
+        suffix: str = ".isoformat()" if is_datetime else ""
+        items.append(f"{key!r}: obj.{attr}{suffix}")
+    source: str = f"def dump(obj):\n    return {{{', '.join(items)}}}\n"
+    namespace: dict = {}
+    exec(compile(source, f"<{cls.__name__}.as_dict>", "exec"), namespace)
+    return namespace["dump"]
+
+
 class Base(AsyncAttrs, DeclarativeBase):
-    pass
+    # Поля словарного представления объекта: пары (ключ словаря, атрибут ORM-модели).
+    # Если в модели не заданы, используются все столбцы таблицы
+    _dict_fields: ClassVar[tuple[tuple[str, str], ...]] = ()
+    # Имена столбцов таблицы модели, заполняются при объявлении подкласса
+    _column_names: ClassVar[frozenset[str]] = frozenset()
+    # Столбцы словарного представления, подписанные ключами словаря (для выборок без ORM-объектов)
+    _dict_columns: ClassVar[tuple[sq.Label, ...]] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        columns: list[str] = cls.__table__.columns.keys()
+        cls._column_names = frozenset(columns)
+        if "_dict_fields" not in cls.__dict__:
+            cls._dict_fields = tuple((name, name) for name in columns)
+        cls._dict_columns = tuple(
+            cls.__table__.columns[attr].label(key) for key, attr in cls._dict_fields
+        )
+        cls._as_dict_fast = staticmethod(_gen_dumper(cls))
+
+    @cached_property
+    def as_dict(self) -> dict:
+        """Свойство словарного представления объекта по полям cls._dict_fields
+
+        Вычисляется один раз на объект и не отражает последующие изменения его полей.
+        Записи обновляются без изменения объектов (см. server.crud.Database.update_by_id),
+        закешированные представления сбрасываются функциями server.cache.invalidate_*.
+
+        :return dict: словарь значений полей объекта
+        """
+        return self._as_dict_fast(self)
 
 
 roles_rights = sq.Table(
@@ -71,17 +152,16 @@ class Right(Base):
     delete: Mapped[bool] = mapped_column(sq.Boolean, default=True)
 
     @classmethod
-    @lru_cache(maxsize=128)
-    def get_rights_for_anon(cls) -> list[Self]:
+    def get_rights_for_anon(cls) -> Mapping[str, SimpleNamespace]:
         """Классовый метод формирования прав для неавторизованного пользователя
 
-        В текущей реализации информация подтягивается из схемы прав server.config.ROLE_RIGHTS_SCHEMA
+        В текущей реализации права заранее сформированы из схемы прав
+        server.config.ROLE_RIGHTS_SCHEMA при импорте конфигурации
 
-        :return list[Self]: список объектов Right
+        :return Mapping[str, SimpleNamespace]: неизменяемый словарь прав с ключами -
+            названиями таблиц
         """
-        for role in ROLE_RIGHTS_SCHEMA:
-            if role["name"] == "anon":
-                return [cls(**right) for right in role["rights"]]
+        return ANON_RIGHTS
 
 
 class Role(Base):
@@ -95,12 +175,37 @@ class Role(Base):
     rights: Mapped[list["Right"]] = relationship("Right", secondary=roles_rights, lazy="joined")
     users: Mapped[list["User"]] = relationship("User", back_populates="role")
 
+    @cached_property
+    def rights_by_model(self) -> dict[str, Right]:
+        """Свойство формирования словаря прав роли
+
+        :return dict[str, Right]: словарь объектов Right с ключами - названиями таблиц
+        """
+        return {right.model: right for right in self.rights}
+
 
 class User(Base):
     """Модель таблицы User"""
 
     __tablename__ = "User"
+    __table_args__ = (
+        # Поиск по подстроке (ILIKE '%...%') использует триграммный индекс (расширение pg_trgm)
+        sq.Index(
+            "ix_user_username_trgm",
+            "username",
+            postgresql_using="gin",
+            postgresql_ops={"username": "gin_trgm_ops"},
+        ),
+        # Упорядочивание по дате с дополнением по id (вывод по курсору, см. FilterSet.get_keyset)
+        sq.Index("ix_user_registered_at_id", "registered_at", "id"),
+    )
     _owner_field = "id"
+    _dict_fields = (
+        ("id", "id"),
+        ("username", "username"),
+        ("role", "role_name"),
+        ("registered_at", "registered_at"),
+    )
 
     id: Mapped[int] = mapped_column(sq.Integer, primary_key=True)
     role_name: Mapped[ROLE] = mapped_column(sq.String(50), sq.ForeignKey(Role.name), default="user")
@@ -117,43 +222,67 @@ class User(Base):
     role: Mapped["Role"] = relationship("Role", back_populates="users")
 
     @property
-    def as_dict(self):
-        return {
-            "id": self.id,
-            "username": self.username,
-            "role": self.role_name,
-            "registered_at": self.registered_at.isoformat(),
-        }
+    def json_with_etag(self) -> tuple[bytes, str]:
+        """Свойство сериализованного словарного представления пользователя и его ETag
+
+        Значение кешируется по идентификатору пользователя (см. server.cache.get_user_profile).
+
+        :return tuple[bytes, str]: JSON-представление объекта и значение заголовка ETag
+        """
+        body: bytes = orjson.dumps(self.as_dict)
+        return body, f'"{blake2b(body, digest_size=16).hexdigest()}"'
 
 
 class Token(Base):
     """Модель таблицы Token"""
 
     __tablename__ = "Token"
+    __table_args__ = (
+        sq.Index("ix_token_token", "token", unique=True),
+        sq.Index("ix_token_created_at", "created_at"),
+    )
     _owner_field = "id_user"
+    _dict_fields = (("token", "token"), ("created_at", "created_at"))
 
     id: Mapped[int] = mapped_column(sq.Integer, primary_key=True)
     id_user: Mapped[int] = mapped_column(sq.Integer, sq.ForeignKey(User.id, ondelete="CASCADE"))
     token: Mapped[UUID] = mapped_column(
-        sq.UUID, server_default=sq.func.gen_random_uuid(), unique=True
+        sq.UUID, server_default=sq.func.gen_random_uuid()
     )
     created_at: Mapped[datetime] = mapped_column(sq.DateTime, server_default=sq.func.now())
 
     user: Mapped["User"] = relationship("User", back_populates="tokens", lazy="joined")
 
-    @property
-    def as_dict(self):
-        return {
-            "token": self.token,
-            "created_at": self.created_at.isoformat(),
-        }
-
 
 class Advertisement(Base):
     """Модель таблицы Advertisement"""
 
     __tablename__ = "Advertisement"
+    __table_args__ = (
+        sq.Index(
+            "ix_advertisement_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        sq.Index(
+            "ix_advertisement_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+        sq.Index("ix_advertisement_created_at_id", "created_at", "id"),
+    )
     _owner_field = "id_user"
+    _dict_fields = (
+        ("id", "id"),
+        ("id_user", "id_user"),
+        ("title", "title"),
+        ("description", "description"),
+        ("price", "price"),
+        ("created_at", "created_at"),
+        ("updated_at", "updated_at"),
+    )
 
     id: Mapped[int] = mapped_column(sq.Integer, primary_key=True)
     id_user: Mapped[int] = mapped_column(sq.Integer, sq.ForeignKey(User.id, ondelete="CASCADE"))
@@ -167,18 +296,6 @@ class Advertisement(Base):
 
     author: Mapped["User"] = relationship("User", back_populates="advertisements")
 
-    @property
-    def as_dict(self):
-        return {
-            "id": self.id,
-            "id_user": self.id_user,
-            "title": self.title,
-            "description": self.description,
-            "price": self.price,
-            "created_at": self.created_at.isoformat(),
-            "updated_at": self.updated_at.isoformat(),
-        }
-
 
 async def close_orm():
     await engine.dispose()
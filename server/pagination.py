@@ -1,17 +1,73 @@
+import re
+from datetime import datetime
 from math import ceil
-from typing import TypeAlias
-from urllib.parse import parse_qs, urlencode, urlparse
+from typing import NamedTuple, TypeAlias
 
+import orjson
+import sqlalchemy as sq
+from pybase64 import urlsafe_b64decode, urlsafe_b64encode
 from sqlalchemy import Select
+from sqlalchemy.orm.attributes import InstrumentedAttribute
 
 from server.config import VALUES_ON_PAGE
 
+# Параметр query-string 'page' вместе с разделителем следующего параметра
+_PAGE_RE = re.compile(r"(?<=[?&])page=[^&]*&?")
+# Параметр query-string 'cursor' вместе с разделителем следующего параметра
+_CURSOR_RE = re.compile(r"(?<=[?&])cursor=[^&#]*&?")
+
+
+def _fits_column(value, column: InstrumentedAttribute) -> bool:
+    """Функция проверки допустимости значения из курсора для параметра запроса по столбцу
+
+    Тип значения должен точно совпадать с типом столбца (bool не принимается вместо int),
+    целые числа должны помещаться в разрядность столбца, строки - не содержать NUL-символов.
+
+    :param value: значение из курсора
+    :param InstrumentedAttribute column: столбец, с которым сравнивается значение
+    :return bool: True - если значение допустимо
+    """
+    python_type: type = column.type.python_type
+    if type(value) is not python_type:
+        return False
+    if python_type is int:
+        bits: int = 64 if isinstance(column.type, sq.BigInteger) else 32
+        return -(2 ** (bits - 1)) <= value < 2 ** (bits - 1)
+    if python_type is str:
+        return "\x00" not in value
+    return True
+
+
+class Keyset(NamedTuple):
+    """Описание упорядочивания, допускающего постраничный вывод по курсору
+
+    :column: столбец упорядочивания
+    :id_column: столбец первичного ключа, дополняющий упорядочивание до уникального
+    :descending: True - если упорядочивание по убыванию
+    :row_key: ключ значения столбца упорядочивания в словарном представлении записи
+        или None, если столбец в него не входит
+    :id_key: ключ первичного ключа в словарном представлении записи
+    :token: параметр упорядочивания, для которого сформирован курсор
+    """
+
+    column: InstrumentedAttribute
+    id_column: InstrumentedAttribute
+    descending: bool
+    row_key: str | None
+    id_key: str
+    token: str
+
 
 class Paginator:
     """Класс пагинации результатов запроса в базу данных
 
     Количество выводимых записей на одной странице задается параметром server.config.VALUES_ON_PAGE.
     Выбор необходимой страницы задается в query-string с помощью параметра 'page'.
+    Если упорядочивание допускает вывод по курсору (см. FilterSet.get_keyset), ссылка на
+        следующую страницу дополнительно содержит параметр 'cursor' - позицию последней
+        записи текущей страницы. Страница с корректным курсором выбирается условием
+        WHERE (столбец, id) > (значение, id) без OFFSET. При некорректном курсоре или его
+        отсутствии используется OFFSET.
     При отсутствии параметра 'page' в query-string выводится первая страница.
     При параметре 'page' превышающем количество существующих страниц выводится последняя страница.
     Для корректной выдачи результатов, необходимо явно определить общее количество
@@ -19,17 +75,37 @@ class Paginator:
             paginator = Paginator(...)
             paginator.quantity_objects = ...
             query = paginator.paginate_query(query)
+        либо получить его вместе с записями страницы (см. paginate_query_with_total).
 
     :url: URL по которому осуществлен HTTP-запрос
-    :pagination_params: словарь с параметрами query-string, опционально содержащий ключ 'page'
+    :pagination_params: словарь с параметрами query-string, опционально содержащий ключи
+        'page' и 'cursor'
     """
 
+    __slots__ = (
+        "quantity_objects",
+        "_page",
+        "_limit",
+        "_last_page",
+        "_offset",
+        "_url",
+        "_url_pre",
+        "_url_post",
+        "_cursor",
+        "_keyset",
+    )
+
     def __init__(self, url: str, pagination_params: dict):
         self.quantity_objects: int = None
         self._page: int = pagination_params.get("page", 1)
         self._limit: int = VALUES_ON_PAGE
         self._last_page: int = None
+        self._offset: int = None
         self._url: str = url
+        self._url_pre: str = None
+        self._url_post: str = None
+        self._cursor: str | None = pagination_params.get("cursor")
+        self._keyset: Keyset | None = None
 
     def _calculate_offset(self) -> int:
         """Метод расчета смещения
@@ -38,55 +114,179 @@ class Paginator:
         """
         if self.quantity_objects is None:
             raise TypeError("Attribute quantity_objects not defined")
-        self._last_page: int = ceil(self.quantity_objects / self._limit)
+        self._last_page: int = max(1, ceil(self.quantity_objects / self._limit))
         if self._page > self._last_page:
             self._page = self._last_page
-        self._offset = (self._page - 1 if self._page > 0 else 0) * self._limit
+        self._offset = (self._page - 1) * self._limit
         return self._offset
 
-    def paginate_query(self, query: Select) -> Select:
+    def paginate_query(self, query: Select, keyset: Keyset | None = None) -> Select:
         """Метод преобразования объекта запроса, добавляющий условия пагинации
 
         :param Select query: объект запрос
+        :param Keyset | None keyset: упорядочивание запроса, допускающее вывод по курсору,
+            defaults to None
         :return Select: преобразованный объект запроса
         """
         offset = self._calculate_offset()
-        return query.limit(self._limit).offset(offset)
+        if keyset is None:
+            return query.limit(self._limit).offset(offset)
+        query: Select = self._set_keyset(query=query, keyset=keyset)
+        position: tuple | None = self._decode_cursor()
+        if position is None:
+            return query.limit(self._limit).offset(offset)
+        key = sq.tuple_(keyset.column, keyset.id_column)
+        condition = key < position if keyset.descending else key > position
+        return query.where(condition).limit(self._limit)
+
+    def paginate_query_with_total(
+        self, query: Select, keyset: Keyset | None = None
+    ) -> Select | None:
+        """Метод преобразования объекта запроса, добавляющий условия пагинации и последним
+        столбцом - общее количество записей COUNT(*) OVER ()
+
+        Количество записей заранее не известно, поэтому используется OFFSET запрошенной
+        страницы. Если страница пуста (записей нет или страница превышает последнюю),
+        количество записей необходимо получить отдельно и использовать paginate_query.
+        При переданном курсоре оконная функция посчитала бы только записи после курсора,
+        поэтому такой запрос не формируется.
+
+        :param Select query: объект запрос
+        :param Keyset | None keyset: упорядочивание запроса, допускающее вывод по курсору,
+            defaults to None
+        :return Select | None: преобразованный объект запроса или None при переданном курсоре
+        """
+        if self._cursor:
+            return None
+        if keyset is not None:
+            query: Select = self._set_keyset(query=query, keyset=keyset)
+        offset: int = (self._page - 1) * self._limit
+        return query.add_columns(sq.func.count().over()).limit(self._limit).offset(offset)
+
+    def _set_keyset(self, query: Select, keyset: Keyset) -> Select:
+        """Метод сохранения упорядочивания для курсора и дополнения его до уникального
+
+        :param Select query: объект запрос
+        :param Keyset keyset: упорядочивание запроса, допускающее вывод по курсору
+        :return Select: запрос с упорядочиванием, дополненным по id
+        """
+        self._keyset = keyset
+        if keyset.column is not keyset.id_column:
+            # id дополняет упорядочивание до уникального: позиция записи однозначна
+            tiebreak = keyset.id_column.desc() if keyset.descending else keyset.id_column
+            query = query.order_by(tiebreak)
+        return query
+
+    def _decode_cursor(self) -> tuple | None:
+        """Метод разбора курсора текущей страницы
+
+        Курсор принимается, только если он сформирован для текущих упорядочивания и страницы.
+
+        :return tuple | None: позиция (значение столбца упорядочивания, id) или None
+        """
+        if not self._cursor:
+            return None
+        try:
+            padding: str = "=" * (-len(self._cursor) % 4)
+            token, page, value, id = orjson.loads(urlsafe_b64decode(self._cursor + padding))
+        except (ValueError, TypeError):
+            return None
+        if token != self._keyset.token or page != self._page:
+            return None
+        if self._keyset.column.type.python_type is datetime and isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        if not _fits_column(value, self._keyset.column) or not _fits_column(
+            id, self._keyset.id_column
+        ):
+            return None
+        return value, id
+
+    def _encode_cursor(self, values: list[dict]) -> str | None:
+        """Метод формирования курсора следующей страницы по последней записи текущей
+
+        :param list[dict] values: словарные представления записей текущей страницы
+        :return str | None: курсор или None, если вывод по курсору невозможен
+        """
+        keyset: Keyset | None = self._keyset
+        if keyset is None or keyset.row_key is None or not values:
+            return None
+        last: dict = values[-1]
+        data: bytes = orjson.dumps(
+            [keyset.token, self._page + 1, last[keyset.row_key], last[keyset.id_key]]
+        )
+        return urlsafe_b64encode(data).decode().rstrip("=")
 
     def get_paginated_page(self, values: list) -> dict:
+        if self._last_page is None:
+            self._calculate_offset()
         self._validate_url()
         return {
             "quantity": self.quantity_objects,
             "current_page": self._page,
             "previous": self._get_url(self._page - 1),
-            "next": self._get_url(self._page + 1),
+            "next": self._get_url(self._page + 1, cursor=self._encode_cursor(values)),
             "results": values,
         }
 
-    def _get_url(self, page: int) -> str:
-        """Метод преобразования URL
+    def _get_url(self, page: int, cursor: str | None = None) -> str:
+        """Метод формирования URL страницы
 
-        Осуществляет замену параметра query-string 'page'.
+        URL собирается из заранее подготовленных частей до и после значения параметра 'page'.
 
         :param int page: номер страницы
-        :return str: преобразованный URL
+        :param str | None cursor: курсор страницы, defaults to None
+        :return str: URL запрошенной страницы или None, если страницы не существует
         """
-        return (
-            self._url.replace(f"page={self._page}", f"page={page}")
-            if 1 <= page <= self._last_page
-            else None
-        )
+        if not 1 <= page <= self._last_page:
+            return None
+        if cursor is not None:
+            return f"{self._url_pre}{page}&cursor={cursor}{self._url_post}"
+        return f"{self._url_pre}{page}{self._url_post}"
+
+    def _split_url(self) -> bool:
+        """Метод разделения URL по значению параметра query-string 'page' без разбора URL
+
+        :return bool: True - если URL содержит единственный параметр 'page' с текущим значением
+        """
+        if self._url.count("page=") != 1:
+            return False
+        for separator in ("?page=", "&page="):
+            start: int = self._url.find(separator)
+            if start != -1:
+                break
+        else:
+            return False
+        value_start: int = start + len(separator)
+        value: str = str(self._page)
+        value_end: int = value_start + len(value)
+        next_char: str = self._url[value_end:][:1]
+        if self._url[value_start:value_end] != value or next_char not in ("", "&", "#"):
+            return False
+        self._url_pre, self._url_post = self._url[:value_start], self._url[value_end:]
+        return True
 
     def _validate_url(self):
         """Метод преобразования URL
 
         Проверяет и преобразует параметр query-string 'page' реальному значению.
+        Параметр 'cursor' удаляется: курсор добавляется только в ссылку на следующую страницу.
+        Если URL уже содержит корректный параметр 'page', разбор query-string не выполняется.
+        Иначе параметр 'page' переносится в конец query-string. Части URL до и после значения
+        параметра сохраняются для формирования ссылок на соседние страницы.
         """
-        parsed_url = urlparse(self._url)
-        qs = parse_qs(parsed_url.query)
-        qs["page"] = self._page
-        new_qs = urlencode(query=qs, doseq=True)
-        self._url = parsed_url._replace(query=new_qs).geturl()
+        if "cursor=" in self._url:
+            url, separator, fragment = self._url.partition("#")
+            self._url = f"{_CURSOR_RE.sub('', url).rstrip('?&')}{separator}{fragment}"
+        if self._split_url():
+            return
+        url, _, fragment = self._url.partition("#")
+        url = _PAGE_RE.sub("", url).rstrip("?&")
+        self._url_pre = f"{url}{'&' if '?' in url else '?'}page="
+        self._url_post = f"#{fragment}" if fragment else ""
+        self._url = f"{self._url_pre}{self._page}{self._url_post}"
 
 
 PAGINATOR_CLASS: TypeAlias = Paginator
@@ -1,18 +1,26 @@
 import re
-from base64 import b64decode
 from datetime import datetime
-from re import Match
 from typing import Annotated, ClassVar
 from uuid import UUID
 
+from pybase64 import b64decode
 from pydantic import BaseModel, Field, field_validator, model_validator
 
+# Предельная длина закодированных данных Basic-авторизации
+_MAX_BASIC_AUTH_LENGTH: int = 8192
+# Таблица удаления пробельных символов из параметра упорядочивания
+_WHITESPACE_TABLE: dict[int, None] = str.maketrans("", "", " \t\r\n")
+
 
 class PaginationParams(BaseModel):
+    model_config = {"defer_build": True}
+
     page: int
 
 
 class BasePaginatedResponse(BaseModel):
+    model_config = {"defer_build": True}
+
     quantity: int
     current_page: int
     previous: str | None
@@ -31,17 +39,18 @@ class PaginatedUserResponse(BasePaginatedResponse):
 
 
 class BaseUserRequest(BaseModel):
+    model_config = {"extra": "forbid", "frozen": True}
+
     username: str
     password: str
 
-    password_pattern: ClassVar = re.compile(r"^(?=.*\d)(?=.*[a-z])(?=.*[A-Z])(?!.*\s).*$")
+    # Просмотры вперед по классам-дополнениям не откатываются, пробелы отсекает \S*
+    password_pattern: ClassVar = re.compile(r"(?=\D*\d)(?=[^a-z]*[a-z])(?=[^A-Z]*[A-Z])\S*")
 
-    @field_validator("password", mode="before")
+    @field_validator("password")
     @classmethod
     def validate_password(cls, value: str) -> str:
-        pattern: str = r"^(?=.*\d)(?=.*[a-z])(?=.*[A-Z])(?!.*\s).*$"
-        result: Match = re.fullmatch(pattern=pattern, string=value)
-        if result:
+        if cls.password_pattern.fullmatch(value):
             return value
         raise ValueError(
             "The password too simple. It must contain numbers, uppercase and lowercase letters."
@@ -72,6 +81,8 @@ class PaginatedAdvertisementsResponse(BasePaginatedResponse):
 
 
 class BaseAdvertisementRequest(BaseModel):
+    model_config = {"extra": "forbid", "frozen": True}
+
     title: str
     description: str
     price: int
@@ -93,12 +104,15 @@ class QueryParams(BaseModel):
 
     page: Annotated[int, Field(1, ge=1)]
     search: Annotated[str | None, Field(None)]
-    order_by: Annotated[tuple[str], Field(["id"])]
+    order_by: Annotated[tuple[str, ...], Field(("id",))]
+    cursor: Annotated[str | None, Field(None)]
 
     @field_validator("order_by", mode="before")
     @classmethod
-    def convert_order_by(cls, value: tuple[str]) -> tuple[str]:
-        return tuple("".join(value).replace(" ", "").split(","))
+    def convert_order_by(cls, value: str | list[str]) -> tuple[str, ...]:
+        if not isinstance(value, str):
+            value: str = "".join(value)
+        return tuple(value.translate(_WHITESPACE_TABLE).split(","))
 
 
 class AuthParams(BaseModel):
@@ -114,8 +128,13 @@ class AuthParams(BaseModel):
             type, auth_data = data["authorization"].split(maxsplit=1)
             match type:
                 case "Basic":
+                    if len(auth_data) > _MAX_BASIC_AUTH_LENGTH:
+                        raise ValueError("Authorization data is too long")
                     decoded_data: str = b64decode(auth_data, validate=True).decode()
-                    data["username"], data["password"] = decoded_data.replace(":", " ").split()
+                    username, separator, password = decoded_data.partition(":")
+                    if not separator:
+                        raise ValueError("Malformed Basic credentials")
+                    data["username"], data["password"] = username, password
                 case "Token":
                     data["token"] = auth_data
         return data
@@ -1,19 +1,41 @@
-from functools import partial
+from dataclasses import asdict
 from typing import Annotated, ClassVar
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi_utils.cbv import cbv
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from server.auth import check_password, check_permissions, hash_password
+from server.auth import (
+    check_password,
+    check_permissions,
+    get_right,
+    hash_password,
+    needs_rehash,
+)
+from server.cache import (
+    detail_cache,
+    get_cached_page,
+    get_user_profile,
+    invalidate_detail,
+    invalidate_pages,
+    invalidate_user_advertisements,
+    invalidate_user_tokens,
+    set_cached_page,
+)
 from server.crud import Database, get_user_by_username
-from server.dependenсies import SessionDependency, get_session, get_user
+from server.dependenсies import (
+    AuthDependency,
+    QueryParamsDependency,
+    SessionDependency,
+    get_database,
+    get_user,
+)
 from server.filters import FILTERSET_CLASS, FilterSet
-from server.models import ORM_MODEL, Advertisement, Token, User
+from server.migrations import migration_status
+from server.models import ORM_MODEL, Advertisement, Right, Token, User
 from server.pagination import PAGINATOR_CLASS, Paginator
 from server.schema import (
     AdvertisementResponse,
-    AuthParams,
     CreateAdvertisementRequest,
     CreateUserRequest,
     PaginatedAdvertisementsResponse,
@@ -28,6 +50,22 @@ from server.schema import (
 usr_router = APIRouter(prefix="/user")
 adv_router = APIRouter(prefix="/advertisement")
 auth_router = APIRouter(prefix="/login")
+health_router = APIRouter(prefix="/health")
+
+
+def json_response(content: dict, status_code: int = status.HTTP_200_OK) -> Response:
+    """Функция формирования JSON-ответа из словарного представления ORM-объекта
+
+    Словарь as_dict уже соответствует схеме ответа, поэтому повторная валидация
+    response_model пропускается (response_model маршрута используется только для документации).
+
+    :param dict content: словарное представление объекта
+    :param int status_code: код ответа, defaults to 200
+    :return Response: ответ с телом, сериализованным orjson
+    """
+    return Response(
+        content=orjson.dumps(content), status_code=status_code, media_type="application/json"
+    )
 
 
 class BaseView:
@@ -36,43 +74,90 @@ class BaseView:
     Для корректной работы всех классов-наследников необходимо переопределить следующие атрибуты:
     :model: ORM-модель, обрабатываемая описываемым view-классом
     :search_fields: поля ORM-модели, по которым может осуществляться контекстный поиск
+    :dbase: зависимость объекта Database для ORM-модели (см. server.dependenсies.get_database)
     """
 
-    session: AsyncSession = Depends(get_session)
     user: User = Depends(get_user)
+    dbase: Database
 
     model: ClassVar[ORM_MODEL] = None
     search_fields: ClassVar[tuple[str]] = None
     filterset_class: ClassVar[FILTERSET_CLASS] = FilterSet
     pagination_class: ClassVar[PAGINATOR_CLASS] = Paginator
 
-    def __init__(self):
-        self.dbase: Database = Database(session=self.session, model=self.model)
-        self.check_permissions = partial(check_permissions, user=self.user, model=self.model)
+    async def check_permissions(self, obj: ORM_MODEL = None, **kwargs):
+        """Метод проверки прав доступа текущего пользователя к ORM-модели view-класса
+
+        :param ORM_MODEL obj: объект ORM-модели, к которому применяются действия, defaults to None
+        Принимаемые именованные аргументы описаны в server.auth.check_permissions.
+        """
+        await check_permissions(self.user, self.model, obj, **kwargs)
 
     async def get_list(self, request: Request, query_params: QueryParams):
         await self.check_permissions(read=True)
-        query_params: dict = query_params.model_dump()
+        url: str = str(request.url)
+        cached: bytes | None = await get_cached_page(model=self.model, url=url)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
         filterset: FilterSet = self.filterset_class(
-            model=self.model, search_fields=self.search_fields, filter_params=query_params
+            model=self.model,
+            search_fields=self.search_fields,
+            search=query_params.search,
+            order_by=query_params.order_by,
         )
         paginator: Paginator = self.pagination_class(
-            url=str(request.url), pagination_params=query_params
+            url=url,
+            pagination_params={"page": query_params.page, "cursor": query_params.cursor},
         )
-        objs: list[ORM_MODEL] = await self.dbase.get_list(filterset=filterset, paginator=paginator)
-        objs: list[dict] = [obj.as_dict for obj in objs]
-        page = paginator.get_paginated_page(values=objs)
-        return page
+        objs: list[dict] = await self.dbase.get_list(filterset=filterset, paginator=paginator)
+        page: dict = paginator.get_paginated_page(values=objs)
+        # Строки получены из базы данных уже в формате схемы ответа: повторная валидация
+        # response_model пропускается, сериализация выполняется orjson
+        body: bytes = orjson.dumps(page)
+        await set_cached_page(model=self.model, url=url, body=body)
+        return Response(content=body, media_type="application/json")
 
     async def get_detail(self, id: int):
         await self.check_permissions(read=True)
-        obj: ORM_MODEL = await self.dbase.get_detail(id=id)
-        return obj.as_dict
+        cached: dict | None = detail_cache.get((self.model, id))
+        if cached is None:
+            obj: ORM_MODEL = await self.dbase.get_detail(id=id)
+            cached: dict = obj.as_dict
+            detail_cache[self.model, id] = cached
+        return json_response(cached)
+
+    async def get_owner_id(self, **kwargs) -> int | None:
+        """Метод проверки прав доступа и получения ограничения по владельцу записи
+
+        Принимаемые именованные аргументы описаны в server.auth.check_permissions.
+
+        :return int | None: идентификатор текущего пользователя, если действие доступно
+            только владельцу записи, иначе None
+        """
+        await self.check_permissions(**kwargs)
+        right: Right = get_right(user=self.user, model=self.model)
+        return self.user.id if right.owner_only else None
+
+    async def update_by_id(self, id: int, validated_data: dict, owner_id: int | None) -> dict:
+        updated: dict | None = await self.dbase.update_by_id(
+            id=id, validated_data=validated_data, owner_id=owner_id
+        )
+        if updated is None:
+            await self.raise_missing_or_forbidden(id)
+        return updated
+
+    async def raise_missing_or_forbidden(self, id: int):
+        # Запрос не затронул ни одной записи: запись отсутствует (get_detail вызывает
+        # ошибку) или принадлежит другому пользователю
+        await self.dbase.get_detail(id=id)
+        raise HTTPException(403, "Action is available only for the owner")
 
     async def delete(self, id: int):
-        obj: ORM_MODEL = await self.dbase.get_detail(id=id)
-        await self.check_permissions(obj=obj, owner_only=True, delete=True)
-        await self.dbase.delete(obj=obj)
+        owner_id: int | None = await self.get_owner_id(delete=True)
+        if not await self.dbase.delete_by_id(id=id, owner_id=owner_id):
+            await self.raise_missing_or_forbidden(id)
+        invalidate_detail(model=self.model, id=id)
+        await invalidate_pages(self.model)
         return {"status": "ok"}
 
 
@@ -82,38 +167,55 @@ class UserView(BaseView):
 
     model = User
     search_fields = ("username",)
+    dbase: Database = Depends(get_database(User))
 
     @usr_router.get("/", response_model=PaginatedUserResponse, status_code=status.HTTP_200_OK)
-    async def get_list(self, request: Request, query_params: Annotated[QueryParams, Query()]):
+    async def get_list(self, request: Request, query_params: QueryParamsDependency):
         return await super().get_list(request, query_params)
 
     @usr_router.get("/{id}/", response_model=UserResponse, status_code=status.HTTP_200_OK)
-    async def get_detail(self, id: int):
+    async def get_detail(self, request: Request, id: int):
         if self.user is not None and self.user.id == id:
-            return self.user.as_dict
+            body, etag = get_user_profile(self.user)
+            headers: dict[str, str] = {"ETag": etag}
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            return Response(content=body, media_type="application/json", headers=headers)
         return await super().get_detail(id)
 
     @usr_router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
     async def create(self, user_info: CreateUserRequest):
         await self.check_permissions(create=True)
-        validated_data: dict = user_info.model_dump()
-        validated_data: dict = hash_password(validated_data)
+        validated_data: dict = user_info.__dict__.copy()
+        validated_data: dict = await hash_password(validated_data)
         created_user: User = await self.dbase.create(validated_data=validated_data)
-        return created_user.as_dict
+        await invalidate_pages(User)
+        return json_response(created_user.as_dict, status_code=status.HTTP_201_CREATED)
 
     @usr_router.patch("/{id}/", response_model=UserResponse, status_code=status.HTTP_200_OK)
     async def update(self, user_info: UpdateUserRequest, id: int):
-        validated_data: dict = user_info.model_dump(exclude_unset=True)
+        validated_data: dict = {
+            field: getattr(user_info, field) for field in user_info.model_fields_set
+        }
+        owner_id: int | None = await self.get_owner_id(update=True)
         if validated_data.get("password"):
-            validated_data: dict = hash_password(validated_data)
-        user: User = await self.dbase.get_detail(id=id)
-        await self.check_permissions(obj=user, owner_only=True, update=True)
-        updated_user: User = await self.dbase.update(obj=user, validated_data=validated_data)
-        return updated_user.as_dict
+            validated_data: dict = await hash_password(validated_data)
+        updated_user: dict = await self.update_by_id(
+            id=id, validated_data=validated_data, owner_id=owner_id
+        )
+        invalidate_user_tokens(user_id=id)
+        invalidate_detail(model=User, id=id)
+        await invalidate_pages(User)
+        return json_response(updated_user)
 
     @usr_router.delete("/{id}/", status_code=status.HTTP_204_NO_CONTENT)
     async def delete(self, id: int):
-        return await super().delete(id)
+        response: dict = await super().delete(id)
+        invalidate_user_tokens(user_id=id)
+        invalidate_user_advertisements(user_id=id)
+        # объявления пользователя удалены каскадно
+        await invalidate_pages(Advertisement)
+        return response
 
 
 @cbv(router=adv_router)
@@ -126,11 +228,12 @@ class AdvertisementView(BaseView):
         "description",
         "price",
     )
+    dbase: Database = Depends(get_database(Advertisement))
 
     @adv_router.get(
         "/", response_model=PaginatedAdvertisementsResponse, status_code=status.HTTP_200_OK
     )
-    async def get_list(self, request: Request, query_params: Annotated[QueryParams, Query()]):
+    async def get_list(self, request: Request, query_params: QueryParamsDependency):
         return await super().get_list(request, query_params)
 
     @adv_router.get("/{id}/", response_model=AdvertisementResponse, status_code=status.HTTP_200_OK)
@@ -140,20 +243,26 @@ class AdvertisementView(BaseView):
     @adv_router.post("/", response_model=AdvertisementResponse, status_code=status.HTTP_201_CREATED)
     async def create(self, adv_info: CreateAdvertisementRequest):
         await self.check_permissions(create=True)
-        validated_data: dict = adv_info.model_dump()
+        validated_data: dict = adv_info.__dict__.copy()
         validated_data["author"] = self.user
         created_adv: Advertisement = await self.dbase.create(validated_data=validated_data)
-        return created_adv.as_dict
+        await invalidate_pages(Advertisement)
+        return json_response(created_adv.as_dict, status_code=status.HTTP_201_CREATED)
 
     @adv_router.patch(
         "/{id}/", response_model=AdvertisementResponse, status_code=status.HTTP_200_OK
     )
     async def update(self, adv_info: UpdateAdvertisementRequest, id: int):
-        validated_data: dict = adv_info.model_dump(exclude_unset=True)
-        adv: Advertisement = await self.dbase.get_detail(id=id)
-        await self.check_permissions(obj=adv, owner_only=True, update=True)
-        updated_adv: Advertisement = await self.dbase.update(obj=adv, validated_data=validated_data)
-        return updated_adv.as_dict
+        validated_data: dict = {
+            field: getattr(adv_info, field) for field in adv_info.model_fields_set
+        }
+        owner_id: int | None = await self.get_owner_id(update=True)
+        updated_adv: dict = await self.update_by_id(
+            id=id, validated_data=validated_data, owner_id=owner_id
+        )
+        invalidate_detail(model=Advertisement, id=id)
+        await invalidate_pages(Advertisement)
+        return json_response(updated_adv)
 
     @adv_router.delete("/{id}/", status_code=status.HTTP_204_NO_CONTENT)
     async def delete(self, id: int):
@@ -161,12 +270,25 @@ class AdvertisementView(BaseView):
 
 
 @auth_router.post("/", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-async def login(session: SessionDependency, auth: Annotated[AuthParams, Header()]):
+async def login(
+    session: SessionDependency,
+    dbase: Annotated[Database, Depends(get_database(Token))],
+    auth: AuthDependency,
+):
     if not all([auth.username, auth.password]):
         raise HTTPException(401, "Basic authorization credentials were not provided")
     user: User = await get_user_by_username(session=session, username=auth.username)
-    if not check_password(auth.password, user.password):
+    if not await check_password(auth.password, user.password):
         raise HTTPException(401, "The provided password is invalid")
-    dbase: Database = Database(session=session, model=Token)
+    if needs_rehash(user.password):
+        hashed_data: dict = await hash_password({"password": auth.password})
+        user.password = hashed_data["password"]
     token: Token = await dbase.create(validated_data={"user": user})
     return token.as_dict
+
+
+@health_router.get("/")
+async def health(response: Response):
+    if migration_status.phase == "failed":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return asdict(migration_status)
@@ -1,4 +1,3 @@
-import asyncio
 from functools import partial
 
 import pytest
@@ -10,7 +9,7 @@ from tests.utils import (
     AsyncAPIClient,
     ClientInfo,
     UserFactory,
-    create_client,
+    create_clients,
     gen_url,
 )
 
@@ -22,17 +21,17 @@ def anyio_backend():
 
 @pytest.fixture(scope="session")
 async def clients_info() -> list[ClientInfo, ClientInfo]:
-    clients = [await create_client(role=role) for role in ("user", "admin")]
+    clients = await create_clients(roles=("user", "admin"))
     return clients
 
 
 @pytest.fixture(scope="session")
 async def client(clients_info: list[ClientInfo, ClientInfo]) -> AsyncAPIClient:
-    client: AsyncAPIClient = AsyncAPIClient(
+    async with AsyncAPIClient(
         transport=ASGITransport(app=app), base_url="http://localhost:8000"
-    )
-    client.user, client.admin = clients_info
-    return client
+    ) as client:
+        client.user, client.admin = clients_info
+        yield client
 
 
 @pytest.fixture(scope="session")
@@ -41,7 +40,7 @@ def user_factory():
         if kwargs.pop("raw", None):
             return UserFactory.stub(**kwargs).__dict__
         if size and size > 1:
-            return await asyncio.gather(*UserFactory.create_batch(size, **kwargs))
+            return await UserFactory.create_bulk(size, **kwargs)
         return await UserFactory.create(**kwargs)
 
     return factory
@@ -53,7 +52,7 @@ def adv_factory():
         if kwargs.pop("raw", None):
             return AdvertisementFactory.stub(**kwargs).__dict__
         if size and size > 1:
-            return await asyncio.gather(*AdvertisementFactory.create_batch(size, **kwargs))
+            return await AdvertisementFactory.create_bulk(size, **kwargs)
         return await AdvertisementFactory.create(**kwargs)
 
     return factory
@@ -1,6 +1,8 @@
 from math import ceil
 
+import orjson
 import pytest
+from pybase64 import urlsafe_b64encode
 
 from server.config import VALUES_ON_PAGE
 from server.models import Advertisement
@@ -10,9 +12,14 @@ pytestmark = pytest.mark.anyio
 BASE_URL = "/advertisement/"
 
 
+@pytest.fixture(scope="module", autouse=True)
+async def seed_once(adv_factory):
+    # данные для тестов списка, только читающих записи, создаются один раз на модуль
+    await adv_factory(VALUES_ON_PAGE * 2)
+
+
 class TestGetList:
-    async def test_get_success(self, url_factory, adv_factory, client: AsyncAPIClient):
-        await adv_factory(VALUES_ON_PAGE)
+    async def test_get_success(self, url_factory, client: AsyncAPIClient):
         url: str = url_factory()
 
         response = await client.get(url=url)
@@ -51,10 +58,7 @@ class TestGetList:
         assert response_json["previous"].startswith("http://")
         assert response_json["next"] is None
 
-    async def test_get_success_search_no_results(
-        self, url_factory, adv_factory, client: AsyncAPIClient
-    ):
-        await adv_factory(VALUES_ON_PAGE)
+    async def test_get_success_search_no_results(self, url_factory, client: AsyncAPIClient):
         search_value: str = "random_value_123"
         url: str = url_factory(search=search_value.upper())
 
@@ -78,8 +82,7 @@ class TestGetList:
         assert adv.as_dict == response_json["results"][0]
         assert response_json["quantity"] == 1
 
-    async def test_get_success_order_by_asc(self, url_factory, adv_factory, client: AsyncAPIClient):
-        await adv_factory(VALUES_ON_PAGE)
+    async def test_get_success_order_by_asc(self, url_factory, client: AsyncAPIClient):
         url: str = url_factory(order_by="id")
 
         response = await client.get(url=url)
@@ -89,10 +92,7 @@ class TestGetList:
         assert response.status_code == 200
         assert sorted_results == response_json["results"]
 
-    async def test_get_success_order_by_desc(
-        self, url_factory, adv_factory, client: AsyncAPIClient
-    ):
-        await adv_factory(VALUES_ON_PAGE)
+    async def test_get_success_order_by_desc(self, url_factory, client: AsyncAPIClient):
         url: str = url_factory(order_by="-id")
 
         response = await client.get(url=url)
@@ -104,6 +104,39 @@ class TestGetList:
         assert response.status_code == 200
         assert sorted_results == response_json["results"]
 
+    async def test_get_success_next_page_cursor(
+        self, url_factory, adv_factory, client: AsyncAPIClient
+    ):
+        await adv_factory(VALUES_ON_PAGE * 2)
+        arrange_response = await client.get(url=url_factory(order_by="-price"))
+        next_url: str = arrange_response.json()["next"]
+        offset_response = await client.get(url=url_factory(order_by="-price", page=2))
+
+        response = await client.get(url=next_url)
+        response_json: dict[str, str | int | list] = response.json()
+
+        assert "cursor=" in next_url
+        assert response.status_code == 200
+        assert response_json["current_page"] == 2
+        assert response_json["results"] == offset_response.json()["results"]
+        assert "cursor=" not in response_json["previous"]
+
+    @pytest.mark.parametrize(
+        "position",
+        ([True, 1], [2**63, 1], [1, False], [1, 2**40], ["1", 1]),
+    )
+    async def test_get_success_tampered_cursor(
+        self, position, url_factory, client: AsyncAPIClient
+    ):
+        data: bytes = orjson.dumps(["-price", 2, *position])
+        cursor: str = urlsafe_b64encode(data).decode().rstrip("=")
+        offset_response = await client.get(url=url_factory(order_by="-price", page=2))
+
+        response = await client.get(url=f"{url_factory(order_by='-price', page=2)}&cursor={cursor}")
+
+        assert response.status_code == 200
+        assert response.json()["results"] == offset_response.json()["results"]
+
 
 class TestGetDetail:
     async def test_get_success(self, url_factory, adv_factory, client: AsyncAPIClient):
@@ -133,6 +166,18 @@ class TestPost:
 
         assert response.status_code == 401
 
+    async def test_post_fail_invalid_token_format(
+        self, url_factory, adv_factory, client: AsyncAPIClient
+    ):
+        adv_data: dict = await adv_factory(raw=True)
+        url: str = url_factory()
+
+        response = await client.post(
+            url=url, json=adv_data, headers={"Authorization": "Token INVALID_TOKEN"}
+        )
+
+        assert response.status_code == 401
+
     async def test_post_success_user(self, url_factory, adv_factory, client: AsyncAPIClient):
         adv_data: dict = await adv_factory(raw=True)
         url: str = url_factory()
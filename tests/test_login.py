@@ -1,7 +1,9 @@
+import bcrypt
 import pytest
 from httpx import BasicAuth
 
 from server.auth import hash_password
+from server.models import Session, User
 from tests.utils import AsyncAPIClient, validate_uuid
 
 pytestmark = pytest.mark.anyio
@@ -11,7 +13,8 @@ BASE_URL = "/login/"
 class TestPost:
     async def test_login_success(self, url_factory, user_factory, client: AsyncAPIClient):
         user_data: dict = await user_factory(raw=True)
-        await user_factory(**hash_password(user_data.copy()))
+        hashed_user_data: dict = await hash_password(user_data.copy())
+        await user_factory(**hashed_user_data)
         url: str = url_factory()
         auth: BasicAuth = BasicAuth(username=user_data["username"], password=user_data["password"])
 
@@ -21,6 +24,22 @@ class TestPost:
         assert response.status_code == 201
         assert validate_uuid(response_json["token"])
 
+    async def test_login_rehash_legacy_password(
+        self, url_factory, user_factory, client: AsyncAPIClient
+    ):
+        user_data: dict = await user_factory(raw=True)
+        legacy_hash: str = bcrypt.hashpw(user_data["password"].encode(), bcrypt.gensalt()).decode()
+        user: User = await user_factory(**(user_data | {"password": legacy_hash}))
+        url: str = url_factory()
+        auth: BasicAuth = BasicAuth(username=user_data["username"], password=user_data["password"])
+
+        response = await client.post(url=url, auth=auth)
+        async with Session() as session:
+            rehashed_user: User = await session.get(User, user.id)
+
+        assert response.status_code == 201
+        assert rehashed_user.password.startswith("$argon2id$")
+
     async def test_login_fail_unauthorized(self, url_factory, client: AsyncAPIClient):
         url: str = url_factory()
 
@@ -32,7 +51,8 @@ class TestPost:
         self, url_factory, user_factory, client: AsyncAPIClient
     ):
         user_data: dict = await user_factory(raw=True)
-        await user_factory(**hash_password(user_data.copy()))
+        hashed_user_data: dict = await hash_password(user_data.copy())
+        await user_factory(**hashed_user_data)
         url: str = url_factory()
         auth: BasicAuth = BasicAuth(username=user_data["username"], password="INVALID_PASSWORD")
 
@@ -10,9 +10,14 @@ pytestmark = pytest.mark.anyio
 BASE_URL = "/user/"
 
 
+@pytest.fixture(scope="module", autouse=True)
+async def seed_once(user_factory):
+    # данные для тестов списка, только читающих записи, создаются один раз на модуль
+    await user_factory(VALUES_ON_PAGE * 2)
+
+
 class TestGetList:
-    async def test_get_success(self, url_factory, user_factory, client: AsyncAPIClient):
-        await user_factory(VALUES_ON_PAGE)
+    async def test_get_success(self, url_factory, client: AsyncAPIClient):
         url: str = url_factory()
 
         response = await client.get(url=url)
@@ -51,10 +56,7 @@ class TestGetList:
         assert response_json["previous"].startswith("http://")
         assert response_json["next"] is None
 
-    async def test_get_success_search_no_results(
-        self, url_factory, user_factory, client: AsyncAPIClient
-    ):
-        await user_factory(VALUES_ON_PAGE)
+    async def test_get_success_search_no_results(self, url_factory, client: AsyncAPIClient):
         search_value: str = "random_value_123"
         url: str = url_factory(search=search_value.upper())
 
@@ -78,10 +80,7 @@ class TestGetList:
         assert user.as_dict == response_json["results"][0]
         assert response_json["quantity"] == 1
 
-    async def test_get_success_order_by_asc(
-        self, url_factory, user_factory, client: AsyncAPIClient
-    ):
-        await user_factory(VALUES_ON_PAGE)
+    async def test_get_success_order_by_asc(self, url_factory, client: AsyncAPIClient):
         url: str = url_factory(order_by="id")
 
         response = await client.get(url=url)
@@ -91,10 +90,7 @@ class TestGetList:
         assert response.status_code == 200
         assert sorted_results == response_json["results"]
 
-    async def test_get_success_order_by_desc(
-        self, url_factory, user_factory, client: AsyncAPIClient
-    ):
-        await user_factory(VALUES_ON_PAGE)
+    async def test_get_success_order_by_desc(self, url_factory, client: AsyncAPIClient):
         url: str = url_factory(order_by="-id")
 
         response = await client.get(url=url)
@@ -127,6 +123,29 @@ class TestGetDetail:
         assert response.status_code == 200
         assert client.admin.as_dict == response_json
 
+    async def test_get_success_client_not_modified(self, url_factory, client: AsyncAPIClient):
+        url: str = url_factory(id=client.admin.id)
+        arrange_response = await client.get(url=url, headers=client.admin.auth_header)
+        etag: str = arrange_response.headers["ETag"]
+
+        response = await client.get(
+            url=url, headers={**client.admin.auth_header, "If-None-Match": etag}
+        )
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+    async def test_get_success_client_no_etag_for_other(self, url_factory, client: AsyncAPIClient):
+        url: str = url_factory(id=client.admin.id)
+
+        anonymous_response = await client.get(url=url)
+        other_response = await client.get(url=url, headers=client.user.auth_header)
+
+        assert anonymous_response.status_code == 200
+        assert "ETag" not in anonymous_response.headers
+        assert other_response.status_code == 200
+        assert "ETag" not in other_response.headers
+
     async def test_get_fail_no_results(self, url_factory, client: AsyncAPIClient):
         url: str = url_factory(id="-1")
 
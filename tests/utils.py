@@ -1,14 +1,35 @@
-from typing import Literal, NamedTuple
-from urllib.parse import urlencode, urlparse
-from uuid import UUID
-
+import random
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Literal
+from urllib.parse import quote_plus, urlparse
+from uuid import UUID, uuid4
+
+import faker
 import sqlalchemy as sq
-from factory import Faker
+from factory import Faker, LazyFunction
 from factory.alchemy import SQLAlchemyModelFactory
-from httpx import AsyncClient
+from httpx import AsyncClient, Headers
+from sqlalchemy.dialects.postgresql import insert
 
 from server.models import Advertisement, Session, Token, User
 
+# Каноническая запись UUID: 8-4-4-4-12 шестнадцатеричных символов
+_UUID_RE = re.compile(
+    r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+)
+
+# Символы, не экранируемые quote_plus: значения только из них подставляются в query-string как есть
+_QUERY_SAFE_TABLE: dict[int, None] = dict.fromkeys(
+    map(ord, "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_.-~")
+)
+
+# Значения полей без ограничений уникальности генерируются один раз при импорте
+_fake = faker.Faker()
+_PASSWORD_POOL: tuple[str, ...] = tuple(_fake.password(special_chars=False) for _ in range(256))
+_DESCRIPTION_POOL: tuple[str, ...] = tuple(_fake.paragraph(nb_sentences=10) for _ in range(256))
+
 
 class BaseFactory(SQLAlchemyModelFactory):
     class Meta:
@@ -23,15 +44,39 @@ class BaseFactory(SQLAlchemyModelFactory):
                 await session.commit()
             except sq.exc.IntegrityError:
                 await session.rollback()
-                unique_column = cls._meta.sqlalchemy_get_or_create
-                query = sq.select(cls._meta.model).where(sq.text(f"{unique_column}=:value"))
-                obj = await session.scalar(query, {"value": getattr(obj, unique_column)})
+                unique_field: str = cls._meta.sqlalchemy_get_or_create
+                # значение уникального поля берется из аргументов, а не из отмененного объекта
+                unique_value = kwargs.get(unique_field)
+                query = sq.select(model_class).where(
+                    getattr(model_class, unique_field) == unique_value
+                )
+                obj = await session.scalar(query)
         return obj
 
+    @classmethod
+    async def create_bulk(cls, size: int, **kwargs) -> list:
+        """Метод создания size объектов одним запросом INSERT ... VALUES (...), (...)
+
+        Строки, нарушающие ограничения уникальности, пропускаются (ON CONFLICT DO NOTHING).
+
+        :param int size: количество создаваемых объектов
+        :return list: созданные объекты ORM-модели
+        """
+        return await cls._insert_bulk([cls.stub(**kwargs).__dict__ for _ in range(size)])
+
+    @classmethod
+    async def _insert_bulk(cls, values: list[dict]) -> list:
+        model = cls._meta.model
+        query = insert(model).values(values).on_conflict_do_nothing().returning(model)
+        async with Session() as session:
+            objs: list = list(await session.scalars(query))
+            await session.commit()
+        return objs
+
 
 class UserFactory(BaseFactory):
     username: str = Faker("hostname")
-    password: str = Faker("password", special_chars=False)
+    password: str = LazyFunction(lambda: random.choice(_PASSWORD_POOL))
 
     class Meta:
         model = User
@@ -39,13 +84,16 @@ class UserFactory(BaseFactory):
 
 
 class TokenFactory(BaseFactory):
+    # токен генерируется на клиенте и известен до выполнения запроса INSERT
+    token: UUID = LazyFunction(uuid4)
+
     class Meta:
         model = Token
 
 
 class AdvertisementFactory(BaseFactory):
     title: str = Faker("sentence", variable_nb_words=False, nb_words=4)
-    description: str = Faker("paragraph", nb_sentences=10)
+    description: str = LazyFunction(lambda: random.choice(_DESCRIPTION_POOL))
     price: int = Faker("pyint")
 
     class Meta:
@@ -59,15 +107,28 @@ class AdvertisementFactory(BaseFactory):
             kwargs.update({"author": user})
         return await super()._create(model_class, *args, **kwargs)
 
-
-class ClientInfo(NamedTuple):
+    @classmethod
+    async def create_bulk(cls, size: int, **kwargs) -> list[Advertisement]:
+        author: User | None = kwargs.pop("author", None)
+        if author is not None:
+            kwargs["id_user"] = author.id
+        if kwargs.get("id_user"):
+            return await super().create_bulk(size, **kwargs)
+        # как и при создании по одному, у каждого объявления свой автор
+        authors: list[User] = await UserFactory.create_bulk(size)
+        values: list[dict] = [cls.stub(id_user=user.id, **kwargs).__dict__ for user in authors]
+        return await cls._insert_bulk(values)
+
+
+@dataclass(frozen=True)
+class ClientInfo:
     id: int
     username: str
     role: str
     registered_at: str
-    auth_header: str
+    auth_header: Headers
 
-    @property
+    @cached_property
     def as_dict(self):
         return {
             "id": self.id,
@@ -84,7 +145,8 @@ class AsyncAPIClient(AsyncClient):
         super().__init__(*args, **kwargs)
 
 
-class UrlParams(NamedTuple):
+@dataclass(slots=True, frozen=True)
+class UrlParams:
     id: int | None = None
     page: str | None = None
     search: str | None = None
@@ -92,20 +154,71 @@ class UrlParams(NamedTuple):
 
     @property
     def query(self):
-        qs: dict = self._asdict()
-        qs.pop("id", None)
-        return {key: val for key, val in qs.items() if val is not None}
+        qs: dict = {}
+        if self.page is not None:
+            qs["page"] = self.page
+        if self.search is not None:
+            qs["search"] = self.search
+        if self.order_by is not None:
+            qs["order_by"] = self.order_by
+        return qs
+
 
+async def create_clients(roles: tuple[Literal["user", "admin"], ...]) -> list[ClientInfo]:
+    """Функция создания тестовых пользователей
 
-async def create_client(role: Literal["user", "admin"]) -> ClientInfo:
-    """Функция создания тестового пользователя
+    Пользователи и их токены создаются двумя запросами INSERT ... VALUES (...), (...).
 
-    :param Literal["user", "admin"] role: роль пользователя
-    :return ClientInfo: namedtuple с информацией о пользователе
+    :param tuple[Literal["user", "admin"], ...] roles: роли пользователей
+    :return list[ClientInfo]: объекты с информацией о пользователях в порядке ролей
     """
-    user: User = await UserFactory(role_name=role)
-    user_token: Token = await TokenFactory(user=user)
-    return ClientInfo(**user.as_dict, auth_header={"Authorization": f"Token {user_token.token}"})
+    users_data: list[dict] = [UserFactory.stub(role_name=role).__dict__ for role in roles]
+    # порядок строк RETURNING не гарантирован: пользователи сопоставляются по имени
+    user_by_name: dict[str, User] = {}
+    pending: list[int] = list(range(len(roles)))
+    while pending:
+        users: list[User] = await UserFactory._insert_bulk([users_data[i] for i in pending])
+        inserted: dict[str, User] = {user.username: user for user in users}
+        retry: list[int] = []
+        for i in pending:
+            user: User | None = inserted.pop(users_data[i]["username"], None)
+            if user is None:
+                # строка с уже существующим именем пропущена (ON CONFLICT DO NOTHING):
+                # для нее генерируется новое имя
+                users_data[i] = UserFactory.stub(role_name=roles[i]).__dict__
+                retry.append(i)
+            else:
+                user_by_name[user.username] = user
+        pending = retry
+    tokens_data: list[dict] = [
+        TokenFactory.stub(id_user=user_by_name[user_data["username"]].id).__dict__
+        for user_data in users_data
+    ]
+    await TokenFactory._insert_bulk(tokens_data)
+    clients: list[ClientInfo] = []
+    for user_data, token_data in zip(users_data, tokens_data):
+        user: User = user_by_name[user_data["username"]]
+        # заголовок кодируется один раз и переиспользуется во всех запросах клиента
+        auth_header: Headers = Headers({"Authorization": f"Token {token_data['token']}"})
+        clients.append(ClientInfo(**user.as_dict, auth_header=auth_header))
+    return clients
+
+
+def encode_query(query: dict) -> str:
+    """Функция формирования query-string из словаря скалярных значений
+
+    Результат совпадает с urlencode(query), значения без спецсимволов не экранируются.
+
+    :param dict query: параметры query-string
+    :return str: query-string без ведущего '?'
+    """
+    parts: list[str] = []
+    for key, value in query.items():
+        value: str = str(value)
+        if value.translate(_QUERY_SAFE_TABLE):
+            value: str = quote_plus(value)
+        parts.append(f"{key}={value}")
+    return "&".join(parts)
 
 
 def gen_url(base_url: str, **kwargs) -> str:
@@ -115,22 +228,25 @@ def gen_url(base_url: str, **kwargs) -> str:
     :return str: сформированный URL
     """
     url_params: UrlParams = UrlParams(**kwargs)
+    if "://" not in base_url and "?" not in base_url and "#" not in base_url:
+        # Базовый URL - только путь: URL собирается без разбора
+        url: str = base_url if url_params.id is None else f"{base_url}{url_params.id}/"
+        query: dict = url_params.query
+        return f"{url}?{encode_query(query)}" if query else url
     parsed_url = urlparse(base_url)
     path = parsed_url.path
     if url_params.id is not None:
         path = f"{path}{url_params.id}/"
-    new_qs = urlencode(query=url_params.query, doseq=True)
+    new_qs = encode_query(url_params.query)
     return parsed_url._replace(path=path, query=new_qs).geturl()
 
 
 def validate_uuid(uuid: str) -> bool:
     """Функция валидации UUID
 
+    Проверяется каноническая запись UUID без создания объекта uuid.UUID.
+
     :param str uuid: уникальный идентификатор
     :return bool: результат валидации
     """
-    try:
-        UUID(uuid)
-        return True
-    except ValueError:
-        return False
+    return isinstance(uuid, str) and _UUID_RE.fullmatch(uuid) is not None